@@ -0,0 +1,225 @@
+# End-to-end harvest benchmark, fully offline.
+#
+#   python -m benchmarks.bench_harvest [--sites 40] [--latency-ms 20] [--slow 0.1]
+#                                      [--dead 0.05] [--missing 0.1] [--json out.json]
+#                                      [--baseline out.json] [--replay crawl.jsonl.gz]
+#                                      [--fixtures] [--page-kb 120]
+#
+# The default corpus is benchmarks/corpus.jsonl.gz, real FQHC sites
+# recorded (see fqhc_harvest.archive) from the centers listed in
+# benchmarks/corpus_centers.csv:
+#
+#   python -m fqhc_harvest benchmarks/corpus_centers.csv -o /tmp/corpus.csv \
+#       --no-resume --no-cache --record benchmarks/corpus.jsonl.gz
+#
+# The scrapers run over its sites with no servers and no network, so it
+# times extraction alone on real pages. --replay names another archive.
+#
+# Without an archive (or with --fixtures) the sample sites under
+# benchmarks/fixtures are served instead (one folder per site;
+# `index.html` is `/`, `about-us.html` is `/about-us`, other files keep
+# their name), each page wrapped in --page-kb of generated theme chrome
+# (see page_chrome), from local stub servers, one per site, cycling
+# through the fixtures until there are --sites hosts. Some hosts answer
+# slowly, some are dead (connection refused), and a share of each site's
+# pages is dropped so they 404.
+#
+# Each scraper's extractors go through pipeline.harvest() in a fresh
+# process, and the table reports rows per second, requests per row,
+# p50/p95 request latency, peak memory (RSS) and the share of fields
+# filled.
+#
+# --json saves the results; --baseline compares against saved results and
+# exits non-zero when a scraper lost more than --tolerance of its rows per
+# second or filled fewer fields.
+import argparse
+import json
+import multiprocessing
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from fqhc_harvest import fetch
+from fqhc_harvest.archive import Replay
+from fqhc_harvest.extractors import (EXTRACTORS, ExecutiveRoles, FoundingYear, HRContact,
+                                     LeadershipNames, MailtoContact)
+from fqhc_harvest.pipeline import harvest
+from fqhc_harvest.telemetry import Telemetry
+from .page_chrome import dress
+from .stub_server import StubServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+CORPUS = Path(__file__).parent / 'corpus.jsonl.gz'
+
+# Scraper -> its extractors, as each app builds them
+SCRAPERS = {
+    'hr': lambda: [HRContact(), MailtoContact()],                # app.py
+    'roles': lambda: [ExecutiveRoles()],                         # new_appy2.py, expanded_paths_app.py
+    'leadership': lambda: [LeadershipNames()],                   # leadership_scraper_app.py
+    'year': lambda: [FoundingYear()],                            # app (3).py
+    'all': lambda: [cls() for cls in EXTRACTORS.values()],       # harvest_app.py, the CLI
+}
+
+
+def load_site(folder: Path, page_kb: int = 0) -> dict:
+    # path -> body for every file of a fixture site, pages dressed in
+    # `page_kb` of theme chrome
+    pages = {}
+    for file in sorted(folder.rglob('*')):
+        if not file.is_file():
+            continue
+        path = file.relative_to(folder).as_posix()
+        if path == 'index.html':
+            path = ''
+        elif path.endswith('.html'):
+            path = path[:-len('.html')]
+        pages['/' + path] = dress(file.read_text(encoding='utf-8'), page_kb)
+    return pages
+
+
+def dead_url() -> str:
+    # A port nothing listens on: connections are refused straight away
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}'
+
+
+def start_sites(args, rng: random.Random):
+    """Start the stub hosts; returns (servers, domains in crawl order)."""
+    sites = [load_site(folder, args.page_kb) for folder in sorted(FIXTURES.iterdir()) if folder.is_dir()]
+    servers, domains = [], []
+    for i in range(args.sites):
+        if rng.random() < args.dead:
+            domains.append(dead_url())
+            continue
+        slow = rng.random() < args.slow
+        stub = StubServer({}, latency=(args.slow_ms if slow else args.latency_ms) / 1000).__enter__()
+        pages = sites[i % len(sites)]
+        for path, body in pages.items():
+            # Sitemaps and robots.txt name the host they are served from
+            if path == '/' or rng.random() >= args.missing:
+                stub.pages[path] = body.replace('{base}', stub.url)
+        servers.append(stub)
+        domains.append(stub.url)
+    return servers, domains
+
+
+def percentile(values: list, share: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[round(share * 100) - 1]
+
+
+def run_scraper(name: str, domains: list, options: dict) -> dict:
+    # Runs in its own process, so peak memory and every cache start fresh
+    extractors = SCRAPERS[name]()
+    with tempfile.TemporaryDirectory() as folder:
+        log = Path(folder) / 'requests.jsonl'
+        telemetry = Telemetry(log)
+        start = time.perf_counter()
+        rows = harvest(domains, extractors, path_stats=False, resume=False, preflight=False,
+                       cache=False, telemetry=telemetry, **options)
+        elapsed = time.perf_counter() - start
+        telemetry.close()
+        with open(log, encoding='utf-8') as f:
+            latencies = [1000 * json.loads(line)['total'] for line in f]
+    latencies = [ms for ms in latencies if ms]
+    values = [value for row in rows for value in row.values()]
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else 0.0
+    return {
+        'scraper': name,
+        'rows': len(rows),
+        'seconds': round(elapsed, 2),
+        'rows_per_s': round(len(rows) / elapsed, 2),
+        # (replayed requests never reach the network, so 0 with --replay)
+        'requests_per_row': round(telemetry.counts()['requests'] / len(rows), 2),
+        'p50_ms': round(percentile(latencies, 0.50), 1),
+        'p95_ms': round(percentile(latencies, 0.95), 1),
+        'peak_mb': round(peak, 1),
+        'filled': round(sum(1 for value in values if value) / len(values), 3) if values else 0.0,
+    }
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    # Messages for every scraper that got slower or found less
+    before = {row['scraper']: row for row in baseline}
+    problems = []
+    for row in results:
+        old = before.get(row['scraper'])
+        if not old:
+            continue
+        if row['rows_per_s'] < old['rows_per_s'] * (1 - tolerance):
+            problems.append(f'{row["scraper"]}: {old["rows_per_s"]} -> {row["rows_per_s"]} rows/s')
+        if row['filled'] < old['filled']:
+            problems.append(f'{row["scraper"]}: filled {old["filled"]:.1%} -> {row["filled"]:.1%}')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline end-to-end harvest benchmark.')
+    parser.add_argument('--sites', type=int, default=40, help='stub hosts to crawl')
+    parser.add_argument('--latency-ms', type=float, default=20, help='think time per request')
+    parser.add_argument('--slow', type=float, default=0.1, help='share of hosts that answer slowly')
+    parser.add_argument('--slow-ms', type=float, default=1500, help='think time on a slow host')
+    parser.add_argument('--dead', type=float, default=0.05, help='share of hosts refusing connections')
+    parser.add_argument('--missing', type=float, default=0.1, help="share of a site's pages that 404")
+    parser.add_argument('--scrapers', default=','.join(SCRAPERS), help='comma-separated subset to run')
+    parser.add_argument('--concurrency', type=int, default=fetch.CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=0, help='per-host requests per second; 0 is off')
+    parser.add_argument('--workers', type=int, default=0, help='parse processes (see pipeline.harvest)')
+    parser.add_argument('--replay', type=Path, help=f'recorded archive to crawl (default: {CORPUS.name} when present)')
+    parser.add_argument('--fixtures', action='store_true', help='serve the fixture sites even when the corpus exists')
+    parser.add_argument('--page-kb', type=int, default=120, help='theme chrome around each fixture page; 0 for none')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', type=Path, help='save the results here')
+    parser.add_argument('--baseline', type=Path, help='results saved earlier with --json to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='rows/s drop tolerated against --baseline')
+    args = parser.parse_args()
+
+    options = dict(concurrency=args.concurrency, rate=args.rate or None, workers=args.workers)
+    if not args.replay and not args.fixtures and CORPUS.exists():
+        args.replay = CORPUS
+    if args.replay:
+        servers, domains = [], Replay(args.replay).sites()
+        options['replay'] = args.replay
+    else:
+        servers, domains = start_sites(args, random.Random(args.seed))
+    results = []
+    try:
+        print(f'{"scraper":<12}{"rows":>6}{"rows/s":>9}{"req/row":>9}{"p50 ms":>9}{"p95 ms":>9}'
+              f'{"peak MB":>9}{"filled":>8}')
+        for name in args.scrapers.split(','):
+            with ProcessPoolExecutor(1, multiprocessing.get_context('spawn')) as pool:
+                row = pool.submit(run_scraper, name, domains, options).result()
+            results.append(row)
+            print(f'{name:<12}{row["rows"]:>6}{row["rows_per_s"]:>9}{row["requests_per_row"]:>9}'
+                  f'{row["p50_ms"]:>9}{row["p95_ms"]:>9}{row["peak_mb"]:>9}{row["filled"]:>8.1%}')
+    finally:
+        for stub in servers:
+            stub.__exit__(None, None, None)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding='utf-8')
+    if args.baseline:
+        problems = compare(results, json.loads(args.baseline.read_text(encoding='utf-8')), args.tolerance)
+        for problem in problems:
+            print(f'regression: {problem}', file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# Role matching: one regex per role vs. the single-pass RoleMatcher.
+#
+#   python -m benchmarks.bench_roles [--kb 50] [page.html ...]
+#
+# With no pages given, a synthetic staff-directory page of --kb kilobytes is
+# used. Pass saved FQHC pages to measure on real captures instead. The
+# per-role regexes grow roughly quadratically with page size, so keep --kb
+# modest or the baseline column takes minutes.
+import argparse
+import random
+import re
+import time
+
+from fqhc_harvest.document import Document
+from fqhc_harvest.roles import ROLES, RoleMatcher
+
+
+def per_role_patterns(roles) -> dict:
+    # The pre-RoleMatcher shape from new_appy2.role_patterns
+    return {
+        role: re.compile(
+            r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)\s*[-–,:]?\s*' + re.escape(role), re.IGNORECASE
+        )
+        for role in roles
+    }
+
+
+def per_role_find(patterns: dict, text: str) -> dict:
+    found = {}
+    for role, pat in patterns.items():
+        m = pat.search(text)
+        found[role] = m.group(1) if m else ''
+    return found
+
+
+def synthetic_page(kb: int) -> str:
+    rng = random.Random(0)
+    first = ['Maria', 'James', 'Linda', 'Robert', 'Aisha', 'Chen', 'Pat', 'Luis']
+    last = ['Garcia', 'Smith', 'Nguyen', 'Johnson', 'Okafor', 'Lee', 'Brown', 'Diaz']
+    filler = ('Our Community Health Center Provides Primary Care Dental Behavioral Health '
+              'And Pharmacy Services To Patients Regardless Of Ability To Pay')
+    titles = ['Nurse Practitioner', 'Physician', 'Dental Hygienist', 'Case Manager', 'Receptionist']
+    parts = []
+    while sum(map(len, parts)) < kb * 1024:
+        parts.append(f'<p>{filler}</p>')
+        name = f'{rng.choice(first)} {rng.choice(last)}'
+        parts.append(f'<li>{name} - {rng.choice(titles)}</li>')
+    # The real hits sit at the very end, as on a long staff directory
+    parts.append('<li>Jane Doe - Chief Financial Officer</li><li>Sam Roe, Dental Director</li>')
+    return '<html><body>' + ''.join(parts) + '</body></html>'
+
+
+def timed(fn, *args, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pages', nargs='*', help='saved HTML pages')
+    parser.add_argument('--kb', type=int, default=50, help='size of the synthetic page')
+    args = parser.parse_args()
+
+    if args.pages:
+        texts = [Document(path, open(path, encoding='utf-8', errors='replace').read()).text
+                 for path in args.pages]
+    else:
+        texts = [Document('synthetic', synthetic_page(args.kb)).text]
+    total_kb = sum(map(len, texts)) / 1024
+
+    print(f'{len(texts)} page(s), {total_kb:.0f} KB of visible text')
+    print(f'{"roles":>6} {"per-role regex":>16} {"RoleMatcher":>12}')
+    for count in (3, 10, 25, len(ROLES)):
+        roles = list(ROLES)[:count]
+        patterns = per_role_patterns(roles)
+        matcher = RoleMatcher(roles)
+        old = timed(lambda: [per_role_find(patterns, t) for t in texts], repeat=1)
+        new = timed(lambda: [matcher.find(t) for t in texts])
+        print(f'{count:>6} {old * 1000:>14.1f}ms {new * 1000:>10.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
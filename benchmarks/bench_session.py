@@ -0,0 +1,69 @@
+# Pooled keep-alive session vs. one connection per request.
+#
+#   python -m benchmarks.bench_session [--centers 20] [--handshake-ms 30]
+#
+# Both sides crawl the same paths against a local stub server; the stub
+# sleeps on every new connection to model TCP+TLS setup.
+import argparse
+import time
+
+import requests
+
+from fqhc_harvest import fetch
+from .stub_server import StubServer
+
+PATHS = [
+    '/', '/about', '/about-us', '/our-team', '/team', '/leadership',
+    '/admin-team', '/info-center/about/leadership', '/info-center/about', '/info'
+]
+PAGE = '<html><body><h2>About</h2><p>' + 'Community health. ' * 200 + '</p></body></html>'
+
+
+def one_connection_per_request(base: str, centers: int):
+    # Today's pattern: a bare requests.get per path, serial.
+    for _ in range(centers):
+        for path in PATHS:
+            requests.get(base + path, timeout=5)
+
+
+def pooled(base: str, centers: int, concurrency: int):
+    async def crawl(fetcher, domain):
+        for path in PATHS:
+            await fetcher.get(domain + path)
+
+    # Every "center" is the same stub host, so per-host rate limiting is off
+    fetch.run([base] * centers, crawl, concurrency=concurrency, rate=None, cache=False)
+
+
+def pooled_serial(base: str, centers: int):
+    # Same shared session, one request at a time: isolates connection reuse
+    # from concurrency.
+    pooled(base, centers, concurrency=1)
+
+
+def measure(stub: StubServer, label: str, fn, *args):
+    stub.reset()
+    start = time.perf_counter()
+    fn(stub.url, *args)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<34} {elapsed:8.2f}s {stub.requests:7d} {stub.connections:7d}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--centers', type=int, default=20)
+    parser.add_argument('--handshake-ms', type=float, default=30)
+    parser.add_argument('--latency-ms', type=float, default=5)
+    parser.add_argument('--concurrency', type=int, default=fetch.CONCURRENCY)
+    args = parser.parse_args()
+
+    pages = {path: PAGE for path in PATHS}
+    with StubServer(pages, latency=args.latency_ms / 1000, handshake=args.handshake_ms / 1000) as stub:
+        print(f'{"pattern":<34} {"time":>9} {"reqs":>7} {"conns":>7}')
+        measure(stub, 'requests.get per path (baseline)', one_connection_per_request, args.centers)
+        measure(stub, 'shared pool, serial', pooled_serial, args.centers)
+        measure(stub, 'shared pool, concurrent', pooled, args.centers, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
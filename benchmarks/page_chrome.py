@@ -0,0 +1,75 @@
+# CMS page chrome for the benchmark fixtures.
+#
+# The fixture sites hold only the content that matters to the extractors.
+# Real FQHC pages come out of WordPress/Elementor-style themes: 100-200 KB
+# of inline stylesheets, a mega menu (which already says "Leadership" and
+# "Message from our CEO" before any content), and script blobs after it.
+# dress() wraps a fixture page in such chrome, so parsing, the prefilter
+# and early stopping are measured on pages of a realistic size and shape.
+# It is generated, not captured: a recorded archive (see bench_harvest's
+# corpus) is the real thing. The chrome names no people, years or email
+# addresses, so what the extractors find is unchanged.
+import json
+
+MENU = {
+    'About Us': ['Our Story', 'Mission and Values', 'Leadership', 'Board of Directors',
+                 'Message from our CEO', 'Annual Reports', 'News', 'Careers'],
+    'Services': ['Primary Care', 'Pediatrics', 'Dental', 'Behavioral Health', 'Pharmacy',
+                 'Vision', 'Women’s Health', 'Substance Use Treatment', 'Telehealth'],
+    'Patients': ['New Patients', 'Patient Portal', 'Sliding Fee Discount', 'Insurance and Billing',
+                 'Patient Rights', 'Forms', 'Interpreter Services'],
+    'Locations': [f'Clinic {n}' for n in range(1, 13)],
+    'Get Involved': ['Donate', 'Volunteer', 'Events', 'Our Team', 'Staff Directory'],
+}
+
+
+def _styles(kb: int) -> str:
+    rules = []
+    i = 0
+    while sum(map(len, rules)) < kb * 1024:
+        rules.append(
+            f'.elementor-{1000 + i} .elementor-element.elementor-element-{i * 7919 % 0xfffff:05x}'
+            f'>.elementor-widget-container{{margin:0 0 {i % 40}px 0;padding:{i % 9}px {i % 13}px;'
+            f'border-radius:{i % 5}px;background-color:#{i * 2654435761 % 0xffffff:06x}}}'
+            f'@media (max-width:{640 + i % 400}px){{.elementor-{1000 + i} .e-con-inner{{flex-wrap:wrap}}}}\n'
+        )
+        i += 1
+    return '<style id="elementor-post-css">\n' + ''.join(rules) + '</style>\n'
+
+
+def _menu() -> str:
+    items = []
+    for n, (top, entries) in enumerate(MENU.items()):
+        links = ''.join(
+            f'<li class="menu-item menu-item-type-post_type menu-item-{4000 + 10 * n + k}">'
+            f'<a href="#" class="elementor-sub-item">{entry}</a></li>'
+            for k, entry in enumerate(entries)
+        )
+        items.append(f'<li class="menu-item menu-item-has-children menu-item-{4000 + n}">'
+                     f'<a href="#" class="elementor-item">{top}</a><ul class="sub-menu">{links}</ul></li>')
+    return ('<nav class="elementor-nav-menu--main elementor-nav-menu__container" aria-label="Menu">'
+            '<ul class="elementor-nav-menu">' + ''.join(items) + '</ul></nav>\n')
+
+
+def _scripts(kb: int) -> str:
+    blocks = []
+    i = 0
+    while sum(map(len, blocks)) < kb * 1024:
+        settings = {'id': i, 'type': 'section', 'settings': {
+            'layout': 'boxed', 'gap': 'default', 'animation': 'fadeIn', 'animation_delay': 100 * (i % 7),
+            'background_background': 'classic', 'responsive': {'tablet': i % 3, 'mobile': i % 2},
+        }}
+        blocks.append(f'<script type="text/template" id="tmpl-elementor-{i}">{json.dumps(settings)}</script>\n')
+        i += 1
+    return ''.join(blocks)
+
+
+def dress(html: str, kb: int) -> str:
+    """`html` (a whole fixture page) inside about `kb` KB of theme chrome."""
+    if not kb or '</body>' not in html:
+        return html
+    head = _styles(kb * 2 // 5)
+    tail = _scripts(kb - kb * 2 // 5)
+    html = html.replace('</head>', head + '</head>', 1)
+    html = html.replace('<body>', '<body>\n' + _menu(), 1)
+    return html.replace('</body>', tail + '</body>', 1)
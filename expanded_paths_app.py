@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
-import re
 import pandas as pd
-import requests
-import tldextract
 import streamlit as st
-from bs4 import BeautifulSoup
 from io import BytesIO
 
+from fqhc_harvest.cli import columns, harvest_csv
+from fqhc_harvest.extractors import ExecutiveRoles
+from fqhc_harvest.sinks import job_sink, output_path
+from fqhc_harvest.ui import background, show_result
+
 st.title("FQHC Executive Roles Scraper (Expanded Paths)")
 st.markdown(
     """
@@ -22,85 +23,35 @@ if not uploaded_file:
     st.info("Please upload a CSV file to begin.")
     st.stop()
 
-df = pd.read_csv(uploaded_file)
-st.write("### Uploaded organizations:", df.head())
-
-def guess_domain(name: str) -> str:
-    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
-    return f"https://{slug}.org"
-
-def extract_domain(website: str) -> str:
-    ext = tldextract.extract(website)
-    if ext.suffix:
-        return f"https://{ext.domain}.{ext.suffix}"
-    return None
-
-def get_domain(row) -> str:
-    site = row.get('Website', '')
-    if pd.notna(site) and site:
-        d = extract_domain(site)
-        if d:
-            return d
-    return guess_domain(row['Name'])
-
-df['Domain'] = df.apply(get_domain, axis=1)
+# Only a preview is parsed here; the job streams the file in chunks
+st.write("### Uploaded organizations:", pd.read_csv(uploaded_file, nrows=5))
 
-# Expanded list of paths including the new leadership path
 paths = [
     '/', '/about', '/about-us', '/our-team', '/team', '/leadership',
     '/admin-team', '/info-center/about/leadership', '/info-center/about', '/info'
 ]
 
-role_patterns = {
-    'Chief Financial Officer': re.compile(r'([A-Z][a-z]+(?: [A-Z][a-z]+)+)\s*[-–:]?\s*Chief Financial Officer', re.IGNORECASE),
-    'Human Resources Director': re.compile(r'([A-Z][a-z]+(?: [A-Z][a-z]+)+)\s*[-–:]?\s*Human Resources Director', re.IGNORECASE),
-    'Chief Operating Officer': re.compile(r'([A-Z][a-z]+(?: [A-Z][a-z]+)+)\s*[-–:]?\s*Chief Operating Officer', re.IGNORECASE),
-}
+# Titles to report; any key of fqhc_harvest.roles.ROLES works here
+roles = ['Chief Financial Officer', 'Human Resources Director', 'Chief Operating Officer']
 
-def extract_roles(text: str) -> dict:
-    found = {role: '' for role in role_patterns}
-    for role, pattern in role_patterns.items():
-        m = pattern.search(text)
-        if m:
-            found[role] = m.group(1).strip()
-    return found
-
-results = []
-progress = st.progress(0)
-total = len(df)
-
-for i, row in df.iterrows():
-    domain = row['Domain'].rstrip('/')
-    data = {role: '' for role in role_patterns}
-    for path in paths:
-        url = domain + path
-        try:
-            r = requests.get(url, timeout=5)
-            if r.status_code != 200:
-                continue
-            roles_found = extract_roles(r.text)
-            for role in data:
-                if roles_found[role] and not data[role]:
-                    data[role] = roles_found[role]
-            if all(data.values()):
-                break
-        except requests.RequestException:
-            continue
-    entry = {'Center': row['Name'], 'Domain': domain}
+def executive_row(center, data):
+    entry = {'Center': center['Name'], 'Domain': center['Domain'].rstrip('/')}
     entry.update(data)
-    results.append(entry)
-    progress.progress((i + 1) / total)
-
-out_df = pd.DataFrame(results)
+    return entry
+
+# Each center's row is written out as soon as it finishes
+def run_harvest(data, restart, path, on_progress, telemetry=None):
+    extractors = [ExecutiveRoles(roles, paths)]
+    with job_sink(path, columns(extractors)) as sink:
+        harvest_csv(BytesIO(data), extractors, sink.write, row=executive_row, on_progress=on_progress,
+                    restart=restart, telemetry=telemetry)
+    return path
+
+restart = st.checkbox("Start over (ignore saved progress)")
+key = f'expanded-executives-{uploaded_file.file_id}-{restart}'
+# Runs in the background, once per upload; later reruns only poll the job
+path = output_path(key)
+path = background(key, run_harvest, uploaded_file.getvalue(), restart, path, partial=path,
+                  telemetry=path.with_suffix('.requests.jsonl'))
 st.write("### Executive roles extraction results:")
-st.dataframe(out_df)
-
-buffer = BytesIO()
-out_df.to_excel(buffer, index=False, engine='openpyxl')
-buffer.seek(0)
-st.download_button(
-    label="Download as Excel",
-    data=buffer,
-    file_name="expanded_paths_executives.xlsx",
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-)
+show_result(path, 'expanded_paths_executives.xlsx')
@@ -0,0 +1,6 @@
+# Shared scraping core for the FQHC harvest apps.
+from .cache import ResponseCache
+from .fetch import Fetcher, Response, run
+from .session import HEADERS, make_session
+
+__all__ = ['Fetcher', 'Response', 'ResponseCache', 'run', 'HEADERS', 'make_session']
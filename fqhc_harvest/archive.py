@@ -0,0 +1,94 @@
+# Record and replay a crawl.
+#
+# A Recorder writes every request a run made (GETs and HEAD probes) with
+# what came back, one JSON line each, to a compressed archive: gzip by
+# default, zstd when the path ends in .zst and the zstandard package is
+# installed. A Replay answers the same requests from such an archive, so
+# a later run sees exactly the pages (truncated ones included) and
+# failures of the recorded one without touching the network, e.g. to
+# iterate on extraction or as a fixture for benchmarks and regressions.
+# Requests the archive does not hold fail as if the host were down.
+import gzip
+import io
+import json
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GET = 'GET'
+HEAD = 'HEAD'
+ZSTD_LEVEL = 10
+
+
+def _open(path, mode: str):
+    # Text stream over a gzip or zstd file; `mode` is 'r' or 'w'
+    path = str(path)
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError('zstandard is needed for .zst archives (pip install zstandard); '
+                              'use a .jsonl.gz path instead')
+        raw = open(path, mode + 'b')
+        if mode == 'w':
+            stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    return gzip.open(path, mode + 't', encoding='utf-8')
+
+
+class Recorder:
+    def __init__(self, path):
+        self.path = path
+        self._file = _open(path, 'w')
+        self._lock = threading.Lock()
+
+    def add(self, method: str, url: str, response=None, status: int = None):
+        """Record one request: a GET's fetch.Response, or a HEAD's status (None: failed)."""
+        entry = {'method': method, 'url': url, 'status': status, 'at': round(time.time(), 3)}
+        if response is not None:
+            entry.update(status=response.status_code, final_url=response.url, text=response.text,
+                         truncated=response.truncated, skipped=response.skipped)
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self._file.close()
+
+
+class Replay:
+    def __init__(self, path):
+        self.path = path
+        self.missing = 0
+        # (method, url) -> entry; bodies stay zlib-compressed until asked for
+        self._entries = {}
+        with _open(path, 'r') as f:
+            for line in f:
+                entry = json.loads(line)
+                if 'text' in entry:
+                    entry['text'] = zlib.compress(entry['text'].encode('utf-8'))
+                self._entries[entry['method'], entry['url']] = entry
+
+    def get(self, method: str, url: str) -> dict:
+        # The recorded entry (with its text back), or None when the request
+        # failed or was never made
+        entry = self._entries.get((method, url))
+        if entry is None:
+            self.missing += 1
+            return None
+        if entry['status'] is None:
+            return None
+        if 'text' in entry:
+            entry = dict(entry, text=zlib.decompress(entry['text']).decode('utf-8'))
+        return entry
+
+    def sites(self) -> list:
+        """scheme://host of every site with a recorded GET, in recording order."""
+        return list(dict.fromkeys(
+            '{0.scheme}://{0.netloc}'.format(urlsplit(url)) for method, url in self._entries if method == GET
+        ))
@@ -0,0 +1,113 @@
+# Persistent HTTP response cache.
+#
+# Keyed by URL and stored in SQLite under settings.CACHE_DIR. Bodies are
+# zlib-compressed; entries older than the TTL are revalidated with
+# If-None-Match / If-Modified-Since, and the least recently used entries
+# are evicted once the stored bodies exceed the size cap.
+import time
+import zlib
+from dataclasses import dataclass
+
+from .settings import connect
+
+TTL = 24 * 3600               # seconds before an entry must be revalidated
+MAX_BYTES = 512 * 1024 ** 2   # cap on compressed body bytes kept on disk
+EVICT_EVERY = 200             # puts between eviction passes
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    final_url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+'''
+
+
+def cacheable(status: int) -> bool:
+    # Keep 404s and friends too, so a re-run doesn't re-probe missing paths;
+    # server errors and throttling are worth retrying next time.
+    return status < 500 and status != 429
+
+
+@dataclass
+class Entry:
+    url: str
+    final_url: str
+    status: int
+    text: str
+    etag: str
+    last_modified: str
+    fetched: float
+
+    def fresh(self, ttl: float) -> bool:
+        return time.time() - self.fetched < ttl
+
+    def validators(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, path=None, ttl: float = TTL, max_bytes: int = MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._db = connect(path, 'responses.sqlite')
+        self._db.executescript(SCHEMA)
+        self._puts = 0
+
+    def get(self, url: str):
+        row = self._db.execute(
+            'SELECT final_url, status, body, etag, last_modified, fetched FROM responses WHERE url = ?',
+            (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        final_url, status, body, etag, last_modified, fetched = row
+        self._db.execute('UPDATE responses SET accessed = ? WHERE url = ?', (time.time(), url))
+        text = zlib.decompress(body).decode('utf-8')
+        return Entry(url, final_url, status, text, etag, last_modified, fetched)
+
+    def put(self, url: str, final_url: str, status: int, text: str,
+            etag: str = None, last_modified: str = None):
+        body = zlib.compress(text.encode('utf-8'))
+        now = time.time()
+        self._db.execute(
+            'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (url, final_url, status, body, len(body), etag, last_modified, now, now)
+        )
+        self._puts += 1
+        if self._puts % EVICT_EVERY == 0:
+            self.evict()
+
+    def revalidated(self, url: str):
+        # A 304 restarts the entry's TTL without rewriting the body.
+        now = time.time()
+        self._db.execute('UPDATE responses SET fetched = ?, accessed = ? WHERE url = ?', (now, now, url))
+
+    def evict(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        doomed = []
+        for url, size in self._db.execute('SELECT url, size FROM responses ORDER BY accessed'):
+            doomed.append((url,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._db.executemany('DELETE FROM responses WHERE url = ?', doomed)
+
+    def close(self):
+        self.evict()
+        self._db.close()
@@ -0,0 +1,284 @@
+# Headless batch mode: CSV in, Excel/CSV/JSONL/Parquet out.
+#
+#   python -m fqhc_harvest centers.csv -o harvest.xlsx --fields hr,roles
+#
+# Runs the same pipeline as the Streamlit apps without a browser, so nightly
+# harvests can run from cron on a server. Saved progress, path statistics
+# and the response cache live in the same CACHE_DIR the apps use. Excel,
+# CSV and JSONL are streamed row by row as centers finish (see sinks);
+# Parquet is written in one go at the end.
+import argparse
+import csv
+import importlib.util
+import io
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from . import fetch, throttle
+from .archive import Recorder, Replay
+from .domains import get_domains
+from .parsing import default_workers
+from .extractors import DEFAULT_ROLES, EXTRACTORS
+from .pipeline import harvest, output_fields
+from .roles import ROLES
+from .sinks import SINKS, open_sink
+from .telemetry import Telemetry
+
+FORMATS = ('xlsx', 'csv', 'jsonl', 'parquet')
+INPUT_COLUMNS = ('Name', 'Website')
+CHUNK_ROWS = 500  # input rows parsed and handed to the crawl at a time
+# Options of a harvest that also apply to probing names for their domain
+PROBE_OPTIONS = ('concurrency', 'per_host', 'timeout', 'rate', 'record', 'replay')
+
+
+def build_extractors(fields, roles=DEFAULT_ROLES) -> list:
+    return [EXTRACTORS[key](roles) if key == 'roles' else EXTRACTORS[key]() for key in fields]
+
+
+def columns(extractors) -> list:
+    return ['Center', 'Domain'] + output_fields(extractors)
+
+
+def center_row(center, data: dict) -> dict:
+    # Default output row: the input row's name and domain, then every field
+    entry = {'Center': center['Name'], 'Domain': center['Domain']}
+    entry.update(data)
+    return entry
+
+
+def read_centers(source, chunksize: int = CHUNK_ROWS):
+    """Read a CSV of centers in chunks of `chunksize` rows.
+
+    Only the INPUT_COLUMNS are parsed, as strings; wide HRSA exports with
+    dozens of other columns cost no more than a two-column file.
+    """
+    return pd.read_csv(source, usecols=lambda col: col in INPUT_COLUMNS, dtype=str,
+                       chunksize=chunksize)
+
+
+def count_rows(source) -> int:
+    # One cheap pass with the csv module (no parsing into frames), so
+    # progress has a total while the rows themselves are still streaming in
+    if hasattr(source, 'read'):
+        start = source.tell()
+        text = io.TextIOWrapper(source, encoding='utf-8', errors='replace', newline='')
+        count = sum(1 for _ in csv.reader(text))
+        text.detach()
+        source.seek(start)
+    else:
+        with open(source, encoding='utf-8', errors='replace', newline='') as f:
+            count = sum(1 for _ in csv.reader(f))
+    return max(count - 1, 0)
+
+
+@contextmanager
+def archives(options: dict):
+    # `options` with one Recorder / Replay for the name probes and the
+    # crawl alike (a second Recorder on the same path would start over)
+    record, replay = options.get('record'), options.get('replay')
+    owned = record is not None and not isinstance(record, Recorder)
+    if owned:
+        record = Recorder(record)
+    if replay is not None and not isinstance(replay, Replay):
+        replay = Replay(replay)
+    try:
+        yield dict(options, record=record, replay=replay)
+    finally:
+        if owned:
+            record.close()
+
+
+def probe_options(options: dict) -> dict:
+    return {key: options[key] for key in PROBE_OPTIONS if key in options}
+
+
+def harvest_rows(centers, extractors, on_row, row=center_row, on_progress=None, total: int = None,
+                 **options):
+    """Harvest every center and hand `on_row` each output row as it finishes.
+
+    `centers` is a DataFrame or an iterable of DataFrame chunks (see
+    read_centers); chunks are read, given their domains and fed to the
+    crawl one at a time, so fetching starts after the first chunk rather
+    than the whole file. Rows arrive in completion order and nothing is
+    kept, so `on_row` is typically a sink's write(). `row(center, data)`
+    builds the output row from the input row (with its 'Domain' filled in)
+    and the harvested fields. `total` (the number of rows, when known)
+    drives progress. `options` are passed through to pipeline.harvest().
+    """
+    if isinstance(centers, pd.DataFrame):
+        total = total or len(centers)
+        centers = [centers]
+    # Input rows still in flight, by their position in the input
+    pending = {}
+
+    def domains():
+        i = 0
+        for chunk in centers:
+            chunk = chunk.assign(Domain=get_domains(chunk, **probe_options(options)))
+            for center in chunk.to_dict('records'):
+                pending[i] = center
+                i += 1
+                yield center['Domain']
+
+    def on_result(i, data):
+        on_row(row(pending.pop(i), data))
+
+    with archives(options) as options:
+        harvest(domains(), extractors, on_progress=on_progress, on_result=on_result,
+                collect=False, total=total, **options)
+
+
+def harvest_csv(source, extractors, on_row, chunksize: int = CHUNK_ROWS, **options):
+    """harvest_rows() straight from a CSV path or binary file object."""
+    total = count_rows(source)
+    harvest_rows(read_centers(source, chunksize), extractors, on_row, total=total, **options)
+    return total
+
+
+def harvest_table(df: pd.DataFrame, extractors, on_progress=None, row=center_row,
+                  **options) -> pd.DataFrame:
+    """Harvest every row of `df` (columns 'Name' and optional 'Website').
+
+    One output row per input row, in input order: Center, Domain, then each
+    extractor's fields. `options` are passed through to pipeline.harvest().
+    """
+    df = df.copy()
+    with archives(options) as options:
+        df['Domain'] = get_domains(df, **probe_options(options))
+        found = harvest(df['Domain'], extractors, on_progress=on_progress, **options)
+    return pd.DataFrame([row(center, data) for (_, center), data in zip(df.iterrows(), found)])
+
+
+def write_table(out: pd.DataFrame, path: Path, fmt: str = None):
+    fmt = fmt or path.suffix.lstrip('.').lower()
+    if fmt == 'xlsx':
+        out.to_excel(path, index=False, engine='openpyxl')
+    elif fmt == 'csv':
+        out.to_csv(path, index=False)
+    elif fmt == 'jsonl':
+        out.to_json(path, orient='records', lines=True, force_ascii=False)
+    elif fmt == 'parquet':
+        # Needs pyarrow or fastparquet; pandas raises ImportError without them
+        out.to_parquet(path, index=False)
+    else:
+        raise ValueError(f'unknown output format {fmt!r}; use one of {", ".join(FORMATS)}')
+
+
+def print_progress(done: int, total: int):
+    sys.stderr.write(f'\r{done}/{total} centers')
+    if done == total:
+        sys.stderr.write('\n')
+    sys.stderr.flush()
+
+
+def print_stages(telemetry: Telemetry):
+    sys.stderr.write(f'{"stage":<28}{"count":>8}{"total s":>10}{"mean ms":>10}{"share":>8}\n')
+    for stage in telemetry.stages():
+        sys.stderr.write(f'{stage["stage"]:<28}{stage["count"]:>8}{stage["total_s"]:>10}'
+                         f'{stage["mean_ms"]:>10}{stage["share"]:>8.1%}\n')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m fqhc_harvest',
+        description="Harvest FQHC contacts from a CSV of centers (columns 'Name' and optional 'Website').",
+    )
+    parser.add_argument('input', type=Path, help='CSV of centers')
+    parser.add_argument('-o', '--output', type=Path, required=True,
+                        help='output file; the format follows the suffix (.xlsx, .csv, .jsonl, .parquet)')
+    parser.add_argument('--format', choices=FORMATS, help='override the format implied by --output')
+    parser.add_argument('--fields', default=','.join(EXTRACTORS),
+                        help=f'comma-separated extractors to run (default: all of {",".join(EXTRACTORS)})')
+    parser.add_argument('--role', action='append', dest='roles', metavar='TITLE',
+                        help='executive title for the roles extractor; repeat for several '
+                             '(default: CFO, HR Director, COO)')
+    parser.add_argument('--restart', action='store_true', help='ignore saved progress for this configuration')
+    parser.add_argument('--no-resume', action='store_true', help='neither read nor save progress')
+    parser.add_argument('--no-discover', action='store_true', help='skip robots.txt/sitemap/link discovery')
+    parser.add_argument('--no-preflight', action='store_true', help='skip the DNS check of every host')
+    parser.add_argument('--no-cache', action='store_true', help='bypass the on-disk response cache')
+    parser.add_argument('--concurrency', type=int, default=fetch.CONCURRENCY)
+    parser.add_argument('--per-host', type=int, default=fetch.PER_HOST)
+    parser.add_argument('--timeout', type=float, default=fetch.TIMEOUT)
+    parser.add_argument('--rate', type=float, default=throttle.RATE,
+                        help='requests per second per host; 0 turns rate limiting off')
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help='processes parsing pages; 0 parses on the crawl thread '
+                             '(default: one per core but one, or 0 on two cores or fewer)')
+    parser.add_argument('--max-kb', type=int, default=fetch.MAX_BYTES // 1024,
+                        help='kilobytes of each page read at most; the rest is skipped')
+    parser.add_argument('--record', type=Path, metavar='ARCHIVE',
+                        help='save every request and response to ARCHIVE (.jsonl.gz, or .zst with zstandard)')
+    parser.add_argument('--replay', type=Path, metavar='ARCHIVE',
+                        help='answer every request from a --record archive instead of the network')
+    parser.add_argument('--metrics', type=Path, metavar='PATH',
+                        help='write per-stage timings and counters here (Prometheus text format)')
+    parser.add_argument('--request-log', type=Path, metavar='PATH',
+                        help='write one JSON line per HTTP request with its stage timings')
+    parser.add_argument('-q', '--quiet', action='store_true', help='no progress on stderr')
+    args = parser.parse_args(argv)
+
+    args.fields = [key.strip() for key in args.fields.split(',') if key.strip()]
+    unknown = [key for key in args.fields if key not in EXTRACTORS]
+    if unknown or not args.fields:
+        parser.error(f'--fields must name some of {", ".join(EXTRACTORS)}; got {", ".join(unknown) or "none"}')
+    unknown = [role for role in args.roles or () if role not in ROLES]
+    if unknown:
+        parser.error(f'unknown title(s): {", ".join(unknown)}')
+    if args.record and args.replay:
+        parser.error('--record and --replay cannot be combined')
+    if not args.format and args.output.suffix.lstrip('.').lower() not in FORMATS:
+        parser.error(f'cannot tell the format of {args.output}; pass --format')
+    # Checked now rather than when the output is written, after the crawl
+    fmt = args.format or args.output.suffix.lstrip('.').lower()
+    if fmt == 'parquet' and not any(importlib.util.find_spec(engine) for engine in ('pyarrow', 'fastparquet')):
+        parser.error('parquet output needs pyarrow or fastparquet (pip install pyarrow)')
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if 'Name' not in pd.read_csv(args.input, nrows=0).columns:
+        sys.stderr.write(f"{args.input}: missing the 'Name' column\n")
+        return 2
+
+    extractors = build_extractors(args.fields, args.roles or DEFAULT_ROLES)
+    telemetry = Telemetry(args.request_log)
+    options = dict(
+        on_progress=None if args.quiet else print_progress,
+        discover=not args.no_discover,
+        preflight=not args.no_preflight,
+        resume=not args.no_resume,
+        restart=args.restart,
+        cache=not args.no_cache,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        timeout=args.timeout,
+        rate=args.rate or None,
+        max_bytes=args.max_kb * 1024,
+        workers=args.workers,
+        record=args.record,
+        replay=args.replay,
+        telemetry=telemetry,
+    )
+    fmt = args.format or args.output.suffix.lstrip('.').lower()
+    try:
+        if fmt in SINKS:
+            # Rows go to disk as each center finishes, in completion order
+            with open_sink(args.output, columns(extractors), fmt) as sink:
+                total = harvest_csv(args.input, extractors, sink.write, **options)
+        else:
+            df = pd.read_csv(args.input, usecols=lambda col: col in INPUT_COLUMNS, dtype=str)
+            total = len(df)
+            write_table(harvest_table(df, extractors, **options), args.output, fmt)
+    finally:
+        telemetry.close()
+    if args.metrics:
+        args.metrics.write_text(telemetry.prometheus(), encoding='utf-8')
+    if not args.quiet:
+        print_stages(telemetry)
+        sys.stderr.write(f'Wrote {total} rows to {args.output}\n')
+    return 0
@@ -0,0 +1,112 @@
+# Finding the pages worth fetching on a site instead of guessing paths.
+#
+# Candidates come from the Sitemap: lines in robots.txt (or /sitemap.xml),
+# and from the links on the homepage. Each candidate is scored against the
+# link keywords of every extractor, and only the best few are crawled,
+# ahead of the fixed path guesses.
+import re
+from urllib.parse import urljoin, urlsplit
+
+# Candidates crawled per center
+LIMIT = 5
+# Sitemap documents read per center (an index counts as one)
+MAX_SITEMAPS = 2
+
+SKIP_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.doc', '.docx',
+                   '.xls', '.xlsx', '.zip', '.mp4', '.mp3', '.css', '.js', '.xml')
+
+
+def _site(host: str) -> str:
+    host = (host or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def sitemaps_from_robots(text: str) -> list:
+    return re.findall(r'^\s*sitemap\s*:\s*(\S+)', text, re.I | re.M)
+
+
+def locs(xml: str) -> list:
+    return [loc.strip() for loc in re.findall(r'<loc>\s*(.*?)\s*</loc>', xml, re.I | re.S)]
+
+
+def _absolute(base: str, url: str) -> str:
+    # urljoin(), or None for a malformed URL ("http://[site_url]/")
+    try:
+        return urljoin(base, url)
+    except ValueError:
+        return None
+
+
+def local_path(url: str, site: str) -> str:
+    # Path of a same-site page link, or None for anything else.
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    if parts.scheme not in ('http', 'https') or _site(parts.hostname) != site:
+        return None
+    path = parts.path or '/'
+    if path.lower().endswith(SKIP_EXTENSIONS):
+        return None
+    return path.rstrip('/') or '/'
+
+
+def score(path: str, text: str, extractors) -> dict:
+    # extractor -> number of its keywords in the path or anchor text
+    haystack = (path.replace('_', '-') + ' ' + text).lower()
+    scores = {}
+    for ex in extractors:
+        hits = sum(1 for keyword in ex.keywords if keyword in haystack)
+        if hits:
+            scores[ex] = hits
+    return scores
+
+
+async def sitemap_urls(fetcher, domain: str) -> list:
+    maps = sitemaps_from_robots(await fetcher.robots(domain))
+    queue = [url for url in (_absolute(domain + '/', url) for url in maps) if url] or [domain + '/sitemap.xml']
+    urls = []
+    for _ in range(MAX_SITEMAPS):
+        if not queue:
+            break
+        r = await fetcher.get(queue.pop(0))
+        if r is None or r.status_code != 200:
+            continue
+        found = locs(r.text)
+        if re.search(r'<sitemapindex', r.text, re.I):
+            # Prefer the child sitemap that lists pages over posts/media
+            found = [url for url in (_absolute(domain + '/', url) for url in found) if url]
+            found.sort(key=lambda url: 'page' not in url.lower())
+            queue = found + queue
+        else:
+            urls.extend(found)
+    return urls
+
+
+async def discover(fetcher, domain: str, home, extractors, limit: int = LIMIT) -> list:
+    """Return up to `limit` (path, [extractors]) candidates, best first.
+
+    `home` is the homepage Document (or None if it could not be fetched).
+    """
+    site = _site(urlsplit(domain).hostname)
+    candidates = {}
+
+    def add(url, text):
+        path = local_path(url, site)
+        if path is None or path == '/':
+            return
+        found = score(path, text, extractors)
+        if found:
+            known = candidates.setdefault(path, {})
+            for ex, hits in found.items():
+                known[ex] = max(known.get(ex, 0), hits)
+
+    if home is not None:
+        for url, text in home.links:
+            add(url, text)
+    for url in await sitemap_urls(fetcher, domain):
+        add(url, '')
+
+    # Most keyword hits first; shallower paths break ties
+    ranked = sorted(candidates.items(), key=lambda item: (-sum(item[1].values()), item[0].count('/'), item[0]))
+    return [(path, list(found)) for path, found in ranked[:limit]]
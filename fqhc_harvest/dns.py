@@ -0,0 +1,101 @@
+# DNS pre-flight.
+#
+# Every distinct host in a run is resolved concurrently before any page is
+# fetched, so centers whose (often guessed) domain does not exist are
+# skipped outright instead of burning a timeout on each path. Answers are
+# kept on disk, and "no such host" answers are cached too.
+import asyncio
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .settings import connect
+
+CONCURRENCY = 64      # lookups in flight
+TIMEOUT = 3           # seconds per lookup
+LIVE_TTL = 24 * 3600  # seconds a resolvable host is trusted
+DEAD_TTL = 6 * 3600   # seconds a non-existent host is remembered
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS hosts (
+    host TEXT PRIMARY KEY,
+    live INTEGER NOT NULL,
+    checked REAL NOT NULL
+);
+'''
+
+
+class HostCache:
+    def __init__(self, path=None):
+        self._db = connect(path, 'dns.sqlite')
+        self._db.executescript(SCHEMA)
+
+    def get(self, host: str):
+        # True/False while the cached answer is fresh, else None
+        row = self._db.execute('SELECT live, checked FROM hosts WHERE host = ?', (host,)).fetchone()
+        if row is None:
+            return None
+        live, checked = row
+        ttl = LIVE_TTL if live else DEAD_TTL
+        return bool(live) if time.time() - checked < ttl else None
+
+    def put(self, host: str, live: bool):
+        self._db.execute('INSERT OR REPLACE INTO hosts VALUES (?, ?, ?)', (host, int(live), time.time()))
+
+    def close(self):
+        self._db.close()
+
+
+async def _lookup(loop, pool, host: str):
+    # True / False for a definite answer, None when the lookup itself failed
+    try:
+        await asyncio.wait_for(
+            loop.run_in_executor(pool, socket.getaddrinfo, host, 443, 0, socket.SOCK_STREAM),
+            TIMEOUT
+        )
+        return True
+    except socket.gaierror as e:
+        if e.errno in (socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', None)):
+            return False
+        return None
+    except (asyncio.TimeoutError, OSError, UnicodeError):
+        return None
+
+
+async def _resolve(hosts, cache: HostCache, concurrency: int) -> dict:
+    loop = asyncio.get_running_loop()
+    answers = {}
+    todo = []
+    for host in dict.fromkeys(hosts):
+        cached = cache.get(host) if cache else None
+        if cached is None:
+            todo.append(host)
+        else:
+            answers[host] = cached
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = await asyncio.gather(*(_lookup(loop, pool, host) for host in todo))
+    for host, live in zip(todo, results):
+        # Timeouts and resolver hiccups are left unanswered: the host is
+        # still tried, and the circuit breaker in fetch catches it if dead.
+        if live is not None:
+            answers[host] = live
+            if cache:
+                cache.put(host, live)
+    return answers
+
+
+def resolve(hosts, cache=True, concurrency: int = CONCURRENCY) -> dict:
+    """Map each host to whether it resolves; hosts whose lookup failed
+    outright are missing from the result.
+
+    `cache` is a HostCache, True for the default on-disk one, or False.
+    """
+    hosts = list(dict.fromkeys(h for h in hosts if h))
+    owned = cache is True
+    if owned:
+        cache = HostCache()
+    try:
+        return asyncio.run(_resolve(hosts, cache or None, concurrency))
+    finally:
+        if owned:
+            cache.close()
@@ -0,0 +1,89 @@
+# Parsed page shared by every extractor.
+#
+# A Document is built once per fetched response and parses lazily: each
+# view below is computed on first use and cached, so extractors that only
+# need the raw HTML never pay for a parse, and the rest share one tree.
+import re
+import time
+from functools import cached_property
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+# Prefer a C parser backend when one is installed.
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+HEADINGS = ['h1', 'h2', 'h3', 'h4']
+
+
+class Document:
+    def __init__(self, url: str, html: str):
+        self.url = url
+        self.html = html
+        # Seconds spent building parse trees so far (see telemetry)
+        self.parse_time = 0.0
+
+    @cached_property
+    def soup(self) -> BeautifulSoup:
+        started = time.perf_counter()
+        soup = BeautifulSoup(self.html, PARSER)
+        self.parse_time += time.perf_counter() - started
+        return soup
+
+    @cached_property
+    def text(self) -> str:
+        # Visible text, as ' '.join(soup.stripped_strings). selectolax gets
+        # there without building the BeautifulSoup tree at all.
+        if LexborHTMLParser is not None and 'soup' not in self.__dict__:
+            started = time.perf_counter()
+            tree = LexborHTMLParser(self.html)
+            tree.strip_tags(['script', 'style', 'template'])
+            self.parse_time += time.perf_counter() - started
+            if tree.root is None:
+                return ''
+            return tree.root.text(separator=' ', strip=True)
+        return ' '.join(self.soup.stripped_strings)
+
+    @cached_property
+    def mailtos(self) -> list:
+        # Addresses from every mailto: link, in page order
+        emails = []
+        for a in self.soup.find_all('a', href=re.compile(r'mailto:', re.I)):
+            m = re.search(r'mailto:([^?]+)', a['href'], re.I)
+            if m:
+                emails.append(m.group(1).strip())
+        return emails
+
+    @cached_property
+    def links(self) -> list:
+        # (absolute URL, anchor text) for every <a href>, minus malformed
+        # ones such as an unfilled template's "http://[site_url]/about"
+        links = []
+        for a in self.soup.find_all('a', href=True):
+            try:
+                url = urljoin(self.url, a['href'].strip())
+            except ValueError:
+                continue
+            links.append((url, a.get_text(' ', strip=True)))
+        return links
+
+    @cached_property
+    def sections(self) -> list:
+        # (heading, section) pairs: each h1-h4 with the element that follows
+        # it, or its parent when it is the last child.
+        pairs = []
+        for header in self.soup.find_all(HEADINGS):
+            section = header.find_next_sibling()
+            if not section:
+                section = header.parent
+            pairs.append((header, section))
+        return pairs
@@ -0,0 +1,183 @@
+# Turning an input row into the site root we crawl.
+#
+# Rows with a Website use it. For rows without one, a ranked set of
+# candidate domains is generated from the Name, filtered through the DNS
+# pre-flight and probed concurrently with HEAD requests; the best-ranked
+# live candidate wins. Name -> domain answers are kept on disk so later
+# runs skip the probing.
+import asyncio
+import re
+import time
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+import pandas as pd
+import tldextract
+
+from . import dns, fetch
+from .settings import connect
+
+FOUND_TTL = 30 * 24 * 3600    # seconds a resolved name is trusted
+MISSING_TTL = 7 * 24 * 3600   # seconds a name with no live candidate is remembered
+
+# Corporate noise dropped from names before building domains
+NOISE = {'inc', 'incorporated', 'llc', 'corp', 'corporation', 'the', 'co', 'ltd', 'pc'}
+# Words left out of the initials (e.g. "Community Health Center of X" -> chcx)
+MINOR = {'of', 'and', 'for', 'in', 'at', 'on', '&'}
+TLDS = ['org', 'com', 'health']
+MEMO = 65536  # distinct websites/names whose derived domain is remembered
+
+# Public suffix list from the snapshot bundled with tldextract: never
+# downloaded, nothing written to disk, the same answer on every machine.
+_extract = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=())
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS names (
+    name TEXT PRIMARY KEY,
+    domain TEXT NOT NULL,
+    checked REAL NOT NULL
+);
+'''
+
+
+@lru_cache(maxsize=MEMO)
+def guess_domain(name: str) -> str:
+    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+    return f"https://{slug}.org"
+
+
+@lru_cache(maxsize=MEMO)
+def extract_domain(website: str) -> str:
+    ext = _extract(website)
+    if ext.suffix:
+        return f"https://{ext.domain}.{ext.suffix}"
+    return None
+
+
+@lru_cache(maxsize=MEMO)
+def normalize_domain(domain: str) -> str:
+    # One key per site however the URL was written: scheme, case, a
+    # leading www. and any path are ignored
+    host = urlsplit(domain if '//' in domain else f'//{domain}').netloc.lower()
+    return host[len('www.'):] if host.startswith('www.') else host
+
+
+def get_domain(row) -> str:
+    site = row.get('Website', '')
+    if pd.notna(site) and site:
+        d = extract_domain(site)
+        if d:
+            return d
+    return guess_domain(row['Name'])
+
+
+def candidate_domains(name: str) -> list:
+    # Most likely first; guess_domain()'s answer always leads.
+    words = [w for w in re.findall(r'[a-z0-9&]+', name.lower()) if w not in NOISE]
+    slug = '-'.join(w for w in words if w != '&')
+    compact = slug.replace('-', '')
+    initials = ''.join(w[0] for w in words if w not in MINOR)
+    labels = [label for label in dict.fromkeys([slug, compact]) if label]
+
+    hosts = [guess_domain(name)[len('https://'):]]
+    for tld in TLDS:
+        hosts.extend(f'{label}.{tld}' for label in labels)
+    # Some sites only answer on www.
+    hosts.extend(f'www.{label}.{tld}' for label in labels for tld in TLDS[:2])
+    # Abbreviations are often someone else's domain, so they rank last
+    if len(initials) >= 3:
+        hosts.extend(f'{initials}.{tld}' for tld in TLDS)
+    return [f'https://{host}' for host in dict.fromkeys(hosts)]
+
+
+class NameCache:
+    def __init__(self, path=None):
+        self._db = connect(path, 'domains.sqlite')
+        self._db.executescript(SCHEMA)
+
+    def get(self, name: str):
+        # The cached domain ('' when none was live) while fresh, else None
+        row = self._db.execute('SELECT domain, checked FROM names WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            return None
+        domain, checked = row
+        ttl = FOUND_TTL if domain else MISSING_TTL
+        return domain if time.time() - checked < ttl else None
+
+    def put(self, name: str, domain: str):
+        self._db.execute('INSERT OR REPLACE INTO names VALUES (?, ?, ?)', (name, domain, time.time()))
+
+    def close(self):
+        self._db.close()
+
+
+def _key(name: str) -> str:
+    return ' '.join(name.lower().split())
+
+
+async def probe(fetcher, candidates: list) -> str:
+    # HEAD every candidate at once and keep the best-ranked one that answers.
+    statuses = await asyncio.gather(*(fetcher.head(url) for url in candidates))
+    for url, status in zip(candidates, statuses):
+        if status is not None:
+            return url
+    return ''
+
+
+def resolve_names(names, cache=True, **options) -> dict:
+    """Map each Name to its live domain ('' when no candidate answered).
+
+    `cache` is a NameCache, True for the default on-disk one, or False.
+    `options` are passed through to fetch.run(). With `replay` (see
+    archive) the probes are answered from the archive, and neither DNS nor
+    the on-disk caches are used.
+    """
+    names = list(dict.fromkeys(names))
+    replaying = options.get('replay') is not None
+    if replaying:
+        cache = False
+    owned = cache is True
+    store = NameCache() if owned else (cache or None)
+    try:
+        found = {}
+        todo = []
+        for name in names:
+            known = store.get(_key(name)) if store else None
+            if known is None:
+                todo.append(name)
+            else:
+                found[name] = known
+        if todo:
+            candidates = {name: candidate_domains(name) for name in todo}
+            # (Candidates the recorded run left out answer as failed from the archive)
+            live = {} if replaying else dns.resolve(
+                urlsplit(url).hostname for urls in candidates.values() for url in urls)
+            for name in todo:
+                candidates[name] = [url for url in candidates[name] if live.get(urlsplit(url).hostname) is not False]
+
+            async def scrape(fetcher, name):
+                return await probe(fetcher, candidates[name])
+
+            for name, domain in zip(todo, fetch.run(todo, scrape, cache=False, **options)):
+                found[name] = domain
+                if store:
+                    store.put(_key(name), domain)
+        return found
+    finally:
+        if owned:
+            store.close()
+
+
+def get_domains(df: pd.DataFrame, **options) -> pd.Series:
+    """Domain for every row: its Website, else the probed domain for its
+    Name, else guess_domain() (which the DNS pre-flight will then skip).
+    `options` are passed through to resolve_names()."""
+    sites = df['Website'] if 'Website' in df else pd.Series(None, index=df.index, dtype=object)
+    # Lists repeat the same site and name once per service location, so
+    # each distinct value is worked out once and mapped back onto the rows
+    known = {site: extract_domain(site) for site in sites.dropna().unique() if site}
+    from_site = sites.map(known)
+    missing = df.loc[from_site.isna(), 'Name']
+    resolved = resolve_names(missing.unique(), **options) if len(missing) else {}
+    fallback = {name: resolved.get(name) or guess_domain(name) for name in missing.unique()}
+    return from_site.where(from_site.notna(), df['Name'].map(fallback))
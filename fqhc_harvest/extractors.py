@@ -0,0 +1,194 @@
+# Extractor registry.
+#
+# Each extractor names the output fields it fills, the paths worth
+# fetching for them, and the link keywords discovery uses to find more such
+# pages on a site, and pulls those fields out of one fetched page. The
+# pipeline fetches and parses each URL once and hands the same page to
+# every extractor that still has empty fields. Extractors read the page
+# through document.Document's cached views instead of parsing it again.
+#
+# `markers` maps a field to keywords, one of which occurs in the raw HTML
+# of any page holding that field; fields without any may be anywhere. The
+# pipeline skips parsing pages that hold none of them. `stops` are the
+# keywords a download may end soon after, once confirm() also finds the
+# field's value in the part read so far (a role title also turns up in
+# nav links and headings, long before any name). A page wanted for a
+# field without stops is read in full.
+# Keywords match case-insensitively anywhere, except all-caps acronyms,
+# which must match exactly and as a word of their own (see prefilter).
+import re
+
+import pandas as pd
+
+from .roles import RoleMatcher
+
+
+class Extractor:
+    label = ''
+    fields = ()
+    paths = ('/',)
+    keywords = ()
+    markers = {}
+    stops = {}
+
+    def extract(self, doc) -> dict:
+        raise NotImplementedError
+
+    def confirm(self, doc) -> set:
+        # The fields whose value is certainly in `doc`, the start of a page
+        # still downloading in which their stop keywords have all shown up
+        return set(self.stops)
+
+    def done(self, data: dict) -> bool:
+        return all(data[field] for field in self.fields)
+
+
+# HR Director name and email (app.py)
+class HRContact(Extractor):
+    label = 'HR Director contact'
+    fields = ('HR Director', 'HR Email')
+    keywords = ('leadership', 'team', 'staff', 'human-resources', 'human resources', 'administration')
+    markers = {'HR Director': ('HR Director',), 'HR Email': ('mailto:',)}
+    # The email is only taken from a page naming the HR Director
+    stops = {'HR Director': ('HR Director',)}
+
+    def __init__(self, paths=('/', '/about', '/about-us', '/our-team', '/team', '/leadership', '/staff')):
+        self.paths = tuple(paths)
+
+    def extract(self, doc) -> dict:
+        if not re.search(r'HR Director', doc.html, re.I):
+            return {}
+        found = {}
+        tag = doc.soup.find(string=re.compile(r'HR Director', re.I))
+        if tag:
+            text = tag.parent.get_text(" ", strip=True)
+            m = re.match(r'(.+?)(?:\s*[-–])', text)
+            if m:
+                found['HR Director'] = m.group(1).strip()
+        if doc.mailtos:
+            found['HR Email'] = doc.mailtos[0]
+        return found
+
+
+# Generic hr@ / jobs@ address from the homepage (app.py fallback)
+class MailtoContact(Extractor):
+    label = 'hr@ / jobs@ email'
+    fields = ('Contact Email',)
+    keywords = ('contact', 'careers', 'jobs', 'employment')
+    markers = {'Contact Email': ('mailto:hr@', 'mailto:jobs@')}
+
+    def __init__(self, paths=('/',)):
+        self.paths = tuple(paths)
+
+    def extract(self, doc) -> dict:
+        for email in doc.mailtos:
+            if re.search(r'\b(hr|jobs)@', email, re.I):
+                return {'Contact Email': email}
+        return {}
+
+
+# The three titles the executive apps have always reported; any ROLES key
+# (or a dict of column -> spellings) can be passed instead.
+DEFAULT_ROLES = ['Chief Financial Officer', 'Human Resources Director', 'Chief Operating Officer']
+
+ROLE_PATHS = (
+    '/', '/about', '/about-us', '/our-team', '/team', '/leadership',
+    '/admin-team', '/info-center/about/leadership', '/info-center/about', '/info'
+)
+
+
+# Named executives by exact title (new_appy2.py / expanded_paths_app.py)
+class ExecutiveRoles(Extractor):
+    label = 'Executive roles'
+    keywords = ('leadership', 'executive', 'administration', 'management', 'team', 'staff', 'board')
+
+    def __init__(self, roles=DEFAULT_ROLES, paths=ROLE_PATHS):
+        self.matcher = RoleMatcher(roles)
+        self.fields = tuple(self.matcher.roles)
+        self.paths = tuple(paths)
+        self.markers = self.matcher.markers()
+        self.stops = self.markers
+
+    def extract(self, doc) -> dict:
+        return self.matcher.find(doc.text)
+
+    def confirm(self, doc) -> set:
+        # A title is no proof: "Message from our CEO" names nobody
+        return {role for role, name in self.extract(doc).items() if name}
+
+
+# Names listed under a leadership/team header (leadership_scraper_app.py)
+class LeadershipNames(Extractor):
+    label = 'Leadership team'
+    fields = ('Leadership',)
+    keywords = ('leadership', 'team', 'staff', 'board', 'executive', 'administration')
+    markers = {'Leadership': ('leadership', 'team', 'staff', 'board')}
+
+    def __init__(self, paths=('/', '/about', '/about-us', '/our-team', '/team', '/leadership',
+                              '/about/leadership', '/who-we-are')):
+        self.paths = tuple(paths)
+
+    def extract(self, doc) -> dict:
+        # Find a leadership header and the section that follows it
+        section = next(
+            (section for header, section in doc.sections
+             if re.search(r'leadership|team|staff|board', header.text, re.I)),
+            None
+        )
+        if section is None:
+            return {}
+        names = []
+        # Collect potential names from <li>, <p>, <h3>
+        for tag in section.find_all(['li','p','h3']):
+            text = tag.get_text(separator=' ', strip=True)
+            # Match typical name patterns (e.g. "Jane Doe")
+            m = re.match(r'([A-Z][a-z]+(?: [A-Z][a-z]+)+)', text)
+            if m:
+                names.append(m.group(1))
+        # Deduplicate
+        return {'Leadership': '; '.join(dict.fromkeys(names))}
+
+
+YEAR_PATTERNS = [
+    r'Founded\s+(?:in\s+)?(\d{4})',
+    r'Estab(?:lished|lishment)\s+(?:in\s+)?(\d{4})',
+    r'Since\s+(\d{4})',
+]
+# Words one of which every YEAR_PATTERNS match starts with
+YEAR_KEYWORDS = ('founded', 'estab', 'since')
+
+
+def find_year(text: str, patterns=YEAR_PATTERNS) -> str:
+    for pat in patterns:
+        m = re.search(pat, text, re.IGNORECASE)
+        if m:
+            year = int(m.group(1))
+            if 1900 <= year <= pd.Timestamp.now().year:
+                return str(year)
+    return ""
+
+
+# Founding year from About/History pages (app (3).py)
+class FoundingYear(Extractor):
+    label = 'Founding year'
+    fields = ('Founding Year',)
+    keywords = ('about', 'history', 'story', 'who-we-are', 'who we are', 'mission')
+
+    def __init__(self, patterns=YEAR_PATTERNS,
+                 paths=('/', '/about', '/about-us', '/our-story', '/history', '/who-we-are')):
+        self.patterns = patterns
+        self.paths = tuple(paths)
+        if patterns is YEAR_PATTERNS:
+            self.markers = {'Founding Year': YEAR_KEYWORDS}
+
+    def extract(self, doc) -> dict:
+        return {'Founding Year': find_year(doc.html, self.patterns)}
+
+
+EXTRACTORS = {
+    'hr': HRContact,
+    'mailto': MailtoContact,
+    'roles': ExecutiveRoles,
+    'leadership': LeadershipNames,
+    'year': FoundingYear,
+}
@@ -0,0 +1,429 @@
+# Concurrent fetch engine shared by all the Streamlit apps.
+#
+# Each app describes how to scrape ONE center as a coroutine
+# `scrape(fetch, item)` that awaits `fetch.get(url)` for the paths it wants,
+# and `run()` drives every center concurrently on a single event loop.
+#
+# Bodies are read as a stream: at most `max_bytes` of a page are kept,
+# anything that is not text/HTML/XML is turned away on its headers, and a
+# caller that knows what it is looking for can pass `until` to stop the
+# download shortly after it has seen it.
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .archive import GET, HEAD, Recorder, Replay
+from .cache import ResponseCache, cacheable
+from .session import KEEPALIVE, make_session
+from .telemetry import RequestRecord, Telemetry
+from .retry import POLICY, SERVER_ERROR, SERVER_ERRORS, SLOW_DOWN, classify
+from .throttle import BACKOFF_STATUSES, RATE, Throttle, crawl_delay
+
+# Defaults; every app can override them per call to run().
+CONCURRENCY = 50   # requests in flight across all hosts
+PER_HOST = 4       # requests in flight against a single host
+TIMEOUT = 5        # seconds, same as the old requests.get(..., timeout=5)
+COOLDOWN = 300     # seconds a host is skipped after a connection failure
+MAX_WAIT = 60      # seconds of Retry-After still worth waiting for in a run
+WINDOW = 4         # items started ahead of completion, per unit of concurrency
+MAX_BYTES = 2 * 1024 ** 2  # body bytes kept per response; the rest is never read
+CHUNK = 64 * 1024  # bytes read from the socket at a time
+OVERLAP = 256      # bytes of the previous chunk `until` looks at again
+AFTER_MATCH = 64 * 1024  # bytes still read once `until` is satisfied
+
+_END = object()
+
+
+@dataclass
+class Response:
+    url: str
+    status_code: int
+    text: str
+    cached: bool = False
+    # Body cut short by max_bytes or `until`, or dropped for its content type
+    truncated: bool = False
+    skipped: bool = False
+
+
+def textual(content_type: str) -> bool:
+    # HTML, plain text and XML (robots.txt, sitemaps); a missing header
+    # gets the benefit of the doubt
+    mime = content_type.split(';', 1)[0].strip().lower()
+    return not mime or mime.startswith('text/') or mime.endswith(('/xml', '+xml'))
+
+
+def decode(body: bytes, charset: str = None) -> str:
+    try:
+        return body.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+class Fetcher:
+    def __init__(self, session: aiohttp.ClientSession, concurrency: int = CONCURRENCY,
+                 per_host: int = PER_HOST, timeout: float = TIMEOUT, cache: ResponseCache = None,
+                 rate: float = RATE, retry: dict = None, telemetry: Telemetry = None,
+                 max_bytes: int = MAX_BYTES, record: Recorder = None, replay: Replay = None):
+        self._session = session
+        self._cache = cache
+        self._limit = asyncio.Semaphore(concurrency)
+        self._per_host = per_host
+        self._hosts = {}
+        # host -> time its circuit closes again
+        self._broken = {}
+        # sock_connect/sock_read let connect and read stalls surface as
+        # separate errors (see retry.classify)
+        self._timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=timeout, sock_read=timeout)
+        # rate=None turns per-host rate limiting (and the robots.txt
+        # pre-fetch it relies on) off
+        self._throttle = Throttle(rate) if rate else None
+        # host -> task fetching its robots.txt
+        self._robots = {}
+        # failure class -> Backoff
+        self._retry = POLICY if retry is None else retry
+        # Per-request timings (see telemetry); read by the pipeline too
+        self.telemetry = telemetry
+        self._max_bytes = max_bytes
+        # Write every request to an archive, or answer them all from one
+        self._record = record
+        self._replay = replay
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self._per_host)
+        return self._hosts[host]
+
+    @asynccontextmanager
+    async def _slot(self, host: str):
+        # Per-host limit and token first, global slot last: a host that has
+        # to wait never sits on a slot another host could use
+        async with self._host_limit(host):
+            if self._throttle:
+                await self._throttle.wait(host)
+            async with self._limit:
+                yield
+
+    def broken(self, host: str) -> bool:
+        return self._broken.get(host, 0) > time.monotonic()
+
+    def trip(self, host: str, seconds: float = COOLDOWN):
+        # Circuit breaker: once a host refuses or fails to connect, its
+        # remaining paths fail fast instead of each waiting out a timeout.
+        self._broken[host] = time.monotonic() + seconds
+
+    def _slow_down(self, host: str, resp) -> bool:
+        # After a 429/503: pause the host and say whether the request is
+        # worth retrying in this run. A Retry-After beyond MAX_WAIT is
+        # treated like a dead host until it has passed.
+        delay = self._throttle.backoff(host, resp.headers.get('Retry-After'))
+        if delay > MAX_WAIT:
+            self.trip(host, delay)
+            return False
+        return True
+
+    async def robots(self, url: str) -> str:
+        """robots.txt of `url`'s site ('' if it has none), fetched once per run."""
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        if host not in self._robots:
+            self._robots[host] = asyncio.ensure_future(
+                self._load_robots(f'{parts.scheme}://{parts.netloc}/robots.txt', host))
+        return await self._robots[host]
+
+    async def _load_robots(self, url: str, host: str) -> str:
+        r = await self.get(url)
+        text = r.text if r is not None and r.status_code == 200 else ''
+        if self._throttle:
+            self._throttle.crawl_delay(host, crawl_delay(text))
+        return text
+
+    async def get(self, url: str, headers: dict = None, until=None):
+        # Returns None when the request fails, so callers can `continue`
+        # exactly like the old `except requests.RequestException` branches.
+        # `until()` makes a check(body, start), fresh for every attempt,
+        # which is asked after every chunk whether the body so far (new
+        # bytes from `start` on) holds everything the caller wants; once it
+        # says yes, AFTER_MATCH more bytes are read and the rest of the page
+        # is dropped. Such partial bodies are not cached.
+        if self._replay:
+            entry = self._replay.get(GET, url)
+            return entry and Response(entry['final_url'], entry['status'], entry['text'],
+                                      truncated=entry['truncated'], skipped=entry['skipped'])
+        response = await self._get(url, headers, until)
+        if self._record:
+            self._record.add(GET, url, response)
+        return response
+
+    async def _get(self, url: str, headers: dict = None, until=None):
+        entry = self._cache.get(url) if self._cache else None
+        host = urlsplit(url).netloc.lower()
+        if entry and entry.fresh(self._cache.ttl):
+            if self.telemetry:
+                self.telemetry.cache_hit(url, host, entry.status)
+            return Response(entry.final_url, entry.status, entry.text, cached=True)
+        if entry:
+            headers = {**(headers or {}), **entry.validators()}
+
+        if self._throttle and urlsplit(url).path != '/robots.txt':
+            # Learn the site's Crawl-delay before its first page
+            await self.robots(url)
+        attempts = {}
+        while True:
+            if self.broken(host):
+                return None
+            queued = time.perf_counter()
+            async with self._slot(host):
+                if self.broken(host):
+                    return None
+                rec = None
+                if self.telemetry:
+                    rec = RequestRecord(url, host, attempt=sum(attempts.values()),
+                                        queue=time.perf_counter() - queued)
+                response, failure = await self._get_once(url, headers, entry, host, until, rec)
+                if rec:
+                    rec.status = response and response.status_code
+                    rec.failure = failure
+                    self.telemetry.finish(rec)
+            if failure is None:
+                return response
+            delay = self._retry_delay(host, failure, attempts)
+            if delay is None:
+                # Out of retries: the last answer (e.g. a 502), or None
+                return response
+            # Outside the slots, so other hosts keep going meanwhile
+            await asyncio.sleep(delay)
+
+    async def _get_once(self, url: str, headers: dict, entry, host: str, until=None, rec=None):
+        # One attempt: (Response or None, failure class or None). `rec`
+        # is the attempt's RequestRecord when telemetry is on.
+        try:
+            async with self._session.get(url, headers=headers, timeout=self._timeout,
+                                         trace_request_ctx=rec) as resp:
+                if resp.status == 304 and entry:
+                    self._cache.revalidated(url)
+                    return Response(entry.final_url, entry.status, entry.text, cached=True), None
+                failure = None
+                if self._throttle and resp.status in BACKOFF_STATUSES:
+                    failure = SLOW_DOWN if self._slow_down(host, resp) else None
+                elif resp.status in SERVER_ERRORS or resp.status == 503:
+                    # (without a throttle a 503 is just another server error)
+                    failure = SERVER_ERROR
+                elif self._throttle:
+                    self._throttle.ok(host)
+                if not textual(resp.headers.get('Content-Type', '')):
+                    # A PDF or image at /about: nothing to extract, so the
+                    # body is never downloaded (cached as an empty page)
+                    response = Response(str(resp.url), resp.status, '', skipped=True)
+                    text, complete = '', True
+                else:
+                    body, complete = await self._read(resp, until)
+                    if rec:
+                        rec.bytes = len(body)
+                    text = decode(body, resp.charset)
+                    response = Response(str(resp.url), resp.status, text,
+                                        truncated=len(body) >= self._max_bytes or not complete)
+                if self._cache and cacheable(resp.status) and complete:
+                    self._cache.put(url, str(resp.url), resp.status, text,
+                                    resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+                return response, failure
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            return None, classify(e)
+
+    async def _read(self, resp, until=None):
+        # (body, complete): the first max_bytes of the body, and whether it
+        # was read as far as the cap rather than stopped early by `until`
+        body = bytearray()
+        check = until() if until else None
+        stop_at = None
+        async for chunk in resp.content.iter_chunked(CHUNK):
+            start = max(len(body) - OVERLAP, 0)
+            body += chunk
+            if len(body) >= self._max_bytes:
+                del body[self._max_bytes:]
+                break
+            if check and stop_at is None and check(body, start):
+                stop_at = len(body) + AFTER_MATCH
+            if stop_at is not None and len(body) >= stop_at:
+                return bytes(body), False
+        return bytes(body), True
+
+    def _retry_delay(self, host: str, failure: str, attempts: dict) -> float:
+        # Seconds to wait before the next attempt, or None to give up (and
+        # trip the host's breaker if the failure class says so)
+        attempt = attempts.get(failure, 0)
+        attempts[failure] = attempt + 1
+        backoff = self._retry.get(failure)
+        if backoff is None:
+            return None
+        if attempt < backoff.retries:
+            return backoff.delay(attempt)
+        if backoff.trip:
+            self.trip(host)
+        return None
+
+    async def head(self, url: str):
+        # Cheap liveness probe: the status of a HEAD request, or None. A
+        # redirect already proves the host serves HTTP, so it isn't followed.
+        # Probes are not retried; a host-level failure still trips the breaker.
+        if self._replay:
+            entry = self._replay.get(HEAD, url)
+            return entry and entry['status']
+        status = await self._head(url)
+        if self._record:
+            self._record.add(HEAD, url, status=status)
+        return status
+
+    async def _head(self, url: str):
+        host = urlsplit(url).netloc.lower()
+        if self.broken(host):
+            return None
+        async with self._slot(host):
+            try:
+                async with self._session.head(url, timeout=self._timeout, allow_redirects=False) as resp:
+                    if self._throttle and resp.status in BACKOFF_STATUSES:
+                        self._slow_down(host, resp)
+                    return resp.status
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                backoff = self._retry.get(classify(e))
+                if backoff and backoff.trip:
+                    self.trip(host)
+                return None
+
+
+async def _run(items, scrape, on_progress, on_result, collect, total, window, concurrency,
+               per_host, timeout, rate, retry, telemetry, max_bytes, record, replay, headers,
+               pool_size, keepalive, cache):
+    loop = asyncio.get_running_loop()
+    # A list or Series is walked in place; anything else may block (reading and
+    # preparing the next chunk of input), so it is advanced on a worker
+    # thread while the loop keeps fetching.
+    lazy = not hasattr(items, '__len__')
+    source = iter(items)
+    results = [] if collect else None
+    finished = asyncio.Queue()
+    slots = asyncio.Semaphore(window or concurrency * WINDOW)
+    # Unfinished tasks only, to cancel on the way out (a set of every task
+    # would hold each center's coroutine until the run ends)
+    tasks = set()
+
+    def start(coro):
+        task = asyncio.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def one(i, item):
+        try:
+            finished.put_nowait((i, await scrape(fetch, item), None))
+        except Exception as e:
+            finished.put_nowait((i, None, e))
+        slots.release()
+
+    async def feed():
+        # Start a task per item, never more than `window` unfinished at once;
+        # signals the end (or a failure of the input itself) with i=None.
+        n = 0
+        try:
+            while True:
+                await slots.acquire()
+                item = await loop.run_in_executor(None, next, source, _END) if lazy else next(source, _END)
+                if item is _END:
+                    break
+                start(one(n, item))
+                n += 1
+        except Exception as e:
+            finished.put_nowait((None, n, e))
+        else:
+            finished.put_nowait((None, n, None))
+
+    # The pool is at least as large as the semaphores allow, so a request
+    # never spends its timeout waiting for a free connection.
+    pool_size = max(pool_size or concurrency, concurrency)
+    traces = [telemetry.trace_config()] if telemetry else None
+    async with make_session(pool_size, per_host, keepalive, headers, traces) as session:
+        fetch = Fetcher(session, concurrency, per_host, timeout, cache, rate, retry, telemetry,
+                        max_bytes, record, replay)
+        start(feed())
+        read, done = None, 0
+        try:
+            while read is None or done < read:
+                i, value, error = await finished.get()
+                if error:
+                    raise error
+                if i is None:
+                    read = value
+                    continue
+                done += 1
+                if collect:
+                    results.extend([None] * (i + 1 - len(results)))
+                    results[i] = value
+                if on_result:
+                    on_result(i, value)
+                if on_progress:
+                    # `total` may only be an estimate for streamed input
+                    on_progress(done, max(total or 0, read or 0, done))
+        finally:
+            for task in list(tasks):
+                task.cancel()
+    return results
+
+
+def run(items, scrape, on_progress=None, on_result=None, collect: bool = True,
+        total: int = None, window: int = None, concurrency: int = CONCURRENCY,
+        per_host: int = PER_HOST, timeout: float = TIMEOUT, rate: float = RATE,
+        retry: dict = None, telemetry: Telemetry = None, max_bytes: int = MAX_BYTES,
+        record=None, replay=None, headers: dict = None, pool_size: int = None, keepalive: float = KEEPALIVE,
+        cache=True) -> list:
+    """Run `scrape(fetch, item)` for every item concurrently.
+
+    `items` is a list, or any iterable (e.g. a generator reading input in
+    chunks), which is consumed lazily: at most `window` items are in flight
+    at a time, so work starts on the first items while later ones are
+    still being read. Pass `total` when it is known up front so progress
+    has a denominator.
+
+    Results come back in input order. `on_progress(done, total)` is called
+    from the calling thread as each item finishes, so it can drive
+    `st.progress` directly. `headers` are merged over the shared
+    `session.HEADERS`.
+
+    `on_result(i, value)` is called the same way with each item's index
+    and result as soon as it finishes, e.g. to stream rows to a sink. With
+    `collect=False` results are not kept and run() returns None, so memory
+    stays flat on very long lists.
+
+    `rate` is the per-host request rate (see throttle); None disables it.
+    `retry` maps failure classes to their Backoff (default retry.POLICY).
+    `telemetry` collects per-request timings (see telemetry.Telemetry).
+    `max_bytes` caps the body bytes read per response.
+    `record` (an archive.Recorder or a path for one) saves every request
+    and its answer; `replay` (an archive.Replay or a path) answers every
+    request from such an archive instead of the network, with neither
+    the response cache nor rate limiting in the way.
+    `cache` is a ResponseCache, True for the default on-disk cache, or
+    False to always hit the network.
+    """
+    if total is None and hasattr(items, '__len__'):
+        total = len(items)
+    if replay is not None:
+        cache, rate = False, None
+        if not isinstance(replay, Replay):
+            replay = Replay(replay)
+    owned = cache is True
+    if owned:
+        cache = ResponseCache()
+    owned_record = record is not None and not isinstance(record, Recorder)
+    if owned_record:
+        record = Recorder(record)
+    try:
+        return asyncio.run(_run(items, scrape, on_progress, on_result, collect, total, window,
+                                concurrency, per_host, timeout, rate, retry, telemetry, max_bytes,
+                                record, replay, headers, pool_size, keepalive, cache or None))
+    finally:
+        if owned:
+            cache.close()
+        if owned_record:
+            record.close()
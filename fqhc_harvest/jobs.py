@@ -0,0 +1,123 @@
+# Checkpointed harvest runs.
+#
+# Progress is written to SQLite as the crawl goes: every URL visited for a
+# center, the fields filled so far, and whether the center finished. A run
+# is identified by its extractor configuration (plus the extractor code),
+# so re-running the same list after a refresh, a widget rerun or a crash
+# returns finished centers straight from the store, picks unfinished ones
+# up where they stopped, and only crawls rows that failed or are new.
+import hashlib
+import inspect
+import json
+import time
+
+from . import extractors as extractors_module, roles as roles_module
+from .cache import cacheable
+from .settings import connect
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS centers (
+    run TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (run, domain)
+);
+CREATE TABLE IF NOT EXISTS urls (
+    run TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status INTEGER,
+    PRIMARY KEY (run, domain, path)
+);
+'''
+
+MAX_AGE = 7 * 24 * 3600  # seconds a finished center is reused before re-crawling
+
+DONE = 'done'
+FAILED = 'failed'
+RUNNING = 'running'
+
+
+def run_key(extractors) -> str:
+    # Same extractors, config and extractor code -> same run. Editing a
+    # regex in extractors.py or roles.py therefore starts a fresh run.
+    spec = [
+        [type(ex).__name__, list(ex.fields), list(ex.paths), repr(getattr(ex, 'patterns', None))]
+        for ex in extractors
+    ]
+    code = inspect.getsource(extractors_module) + inspect.getsource(roles_module)
+    blob = json.dumps(spec) + code
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()[:16]
+
+
+class Checkpoint:
+    # Resume state and write-through progress for one center.
+    def __init__(self, store, run: str, domain: str, data: dict, visited: set):
+        self._store = store
+        self._run = run
+        self._domain = domain
+        self.data = data
+        self.visited = visited
+        # A resumed center already had answers in an earlier attempt
+        self.reached = bool(visited)
+
+    def visit(self, path: str, status, data: dict):
+        # `status` is None when the host could not be reached. Server errors
+        # and throttling are no answer either: the path is kept as
+        # unreachable, so the next run asks again.
+        if status is not None and not cacheable(status):
+            status = None
+        self.reached = self.reached or status is not None
+        self._store._db.execute(
+            'INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?)', (self._run, self._domain, path, status)
+        )
+        self._store._save(self._run, self._domain, RUNNING, data)
+
+    def finish(self, data: dict, failed: bool = False):
+        self._store._save(self._run, self._domain, FAILED if failed else DONE, data)
+
+
+class JobStore:
+    def __init__(self, path=None):
+        self._db = connect(path, 'jobs.sqlite')
+        self._db.executescript(SCHEMA)
+
+    def _save(self, run: str, domain: str, status: str, data: dict):
+        self._db.execute(
+            'INSERT OR REPLACE INTO centers VALUES (?, ?, ?, ?, ?)',
+            (run, domain, status, json.dumps(data), time.time())
+        )
+
+    def finished(self, run: str) -> dict:
+        # domain -> data for every center this run completed recently
+        return {
+            domain: json.loads(data)
+            for domain, data in self._db.execute(
+                'SELECT domain, data FROM centers WHERE run = ? AND status = ? AND updated > ?',
+                (run, DONE, time.time() - MAX_AGE)
+            )
+        }
+
+    def checkpoint(self, run: str, domain: str, fields: list) -> Checkpoint:
+        row = self._db.execute(
+            'SELECT data FROM centers WHERE run = ? AND domain = ?', (run, domain)
+        ).fetchone()
+        data = {field: '' for field in fields}
+        if row:
+            data.update(json.loads(row[0]))
+        # Paths that answered are not fetched again; unreachable or erroring ones are retried
+        visited = {
+            path for (path,) in self._db.execute(
+                'SELECT path FROM urls WHERE run = ? AND domain = ? AND status IS NOT NULL', (run, domain)
+            )
+        }
+        return Checkpoint(self, run, domain, data, visited)
+
+    def reset(self, run: str):
+        self._db.execute('DELETE FROM centers WHERE run = ?', (run,))
+        self._db.execute('DELETE FROM urls WHERE run = ?', (run,))
+
+    def close(self):
+        self._db.close()
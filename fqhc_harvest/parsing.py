@@ -0,0 +1,83 @@
+# Page parsing and extraction in worker processes.
+#
+# Building parse trees and running the extractors' regexes is pure-Python,
+# CPU-bound work that holds the GIL, so on the event loop it caps a harvest
+# at one core however many pages arrive. A ParsePool hands each page to a
+# pool of processes instead: the page text and the indexes of the wanted
+# extractors go in, and a small PageResult (fields found, timings, links
+# when asked) comes back. Each worker receives the run's extractors once,
+# when it starts. At most `workers * BACKLOG` pages are handed to the pool
+# at a time. A center whose page finds the pool full waits, holding that
+# page, before fetching anything else, so a slow pool slows the crawl down
+# but does not bound memory by itself: pages waiting for a slot are capped
+# by fetch.run's window of unfinished centers, each with one page of up to
+# max_bytes.
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from .document import Document
+
+BACKLOG = 2  # pages handed to the pool per worker before the next one waits
+
+# The run's extractors, in each worker process
+_extractors = ()
+
+
+def default_workers() -> int:
+    # One core stays with the event loop; 0 (parse in-process) on small boxes
+    cores = os.cpu_count() or 1
+    return cores - 1 if cores > 2 else 0
+
+
+@dataclass
+class PageResult:
+    found: dict = field(default_factory=dict)    # extractor index -> its fields
+    seconds: dict = field(default_factory=dict)  # extractor index -> extract time
+    parse: float = 0.0
+    links: list = None
+
+
+def _init(extractors):
+    global _extractors
+    _extractors = extractors
+
+
+def extract_page(url: str, text: str, wanted: tuple, links: bool = False) -> PageResult:
+    # Runs in a worker: the wanted extractors over one page
+    doc = Document(url, text)
+    result = PageResult()
+    for i in wanted:
+        started, parsed = time.perf_counter(), doc.parse_time
+        result.found[i] = _extractors[i].extract(doc)
+        result.seconds[i] = time.perf_counter() - started - (doc.parse_time - parsed)
+    if links:
+        result.links = doc.links
+    result.parse = doc.parse_time
+    return result
+
+
+class ParsePool:
+    def __init__(self, extractors, workers: int):
+        self.extractors = tuple(extractors)
+        self.workers = workers
+        # spawn: forking a process that runs an event loop and threads
+        # (the Streamlit server, Runner) is not safe
+        self._pool = ProcessPoolExecutor(self.workers, multiprocessing.get_context('spawn'),
+                                         initializer=_init, initargs=(self.extractors,))
+        self._slots = None
+
+    async def extract(self, url: str, text: str, wanted, links: bool = False) -> PageResult:
+        """Run the `wanted` extractors over a page in a worker process."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers * BACKLOG)
+        wanted = tuple(self.extractors.index(ex) for ex in wanted)
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool, extract_page, url, text, wanted, links)
+
+    def close(self):
+        self._pool.shutdown(cancel_futures=True)
@@ -0,0 +1,59 @@
+# Which paths actually produce data, remembered across runs.
+#
+# For every (extractor, path) pair we count how often the path was fetched
+# for that extractor and how often it filled at least one new field. The
+# pipeline tries paths in order of smoothed hit rate, so e.g. /leadership
+# is fetched before / once it has proven itself on other domains.
+
+from .settings import connect
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS path_stats (
+    extractor TEXT NOT NULL,
+    path TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    PRIMARY KEY (extractor, path)
+);
+'''
+
+
+def _key(extractor) -> str:
+    return type(extractor).__name__
+
+
+class PathStats:
+    def __init__(self, path=None):
+        self._db = connect(path, 'paths.sqlite')
+        self._db.executescript(SCHEMA)
+        self._counts = {
+            (extractor, p): [attempts, hits]
+            for extractor, p, attempts, hits in self._db.execute('SELECT * FROM path_stats')
+        }
+        # What this run added, merged into the table on close so concurrent
+        # harvests don't overwrite each other's counts
+        self._new = {}
+
+    def hit_rate(self, extractor, path: str) -> float:
+        # Laplace-smoothed, so unseen paths score 0.5 and keep their
+        # configured order until there is evidence either way.
+        attempts, hits = self._counts.get((_key(extractor), path), (0, 0))
+        return (hits + 1) / (attempts + 2)
+
+    def score(self, extractors, path: str) -> float:
+        # A page several extractors still want is worth more than one.
+        return sum(self.hit_rate(ex, path) for ex in extractors)
+
+    def record(self, extractor, path: str, hit: bool):
+        key = (_key(extractor), path)
+        for counts in (self._counts.setdefault(key, [0, 0]), self._new.setdefault(key, [0, 0])):
+            counts[0] += 1
+            counts[1] += int(hit)
+
+    def close(self):
+        self._db.executemany(
+            'INSERT INTO path_stats VALUES (?, ?, ?, ?) ON CONFLICT (extractor, path) DO UPDATE '
+            'SET attempts = attempts + excluded.attempts, hits = hits + excluded.hits',
+            [(extractor, p, attempts, hits) for (extractor, p), (attempts, hits) in self._new.items()]
+        )
+        self._db.close()
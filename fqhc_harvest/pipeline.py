@@ -0,0 +1,304 @@
+# Fetch once, extract many.
+#
+# For each center the pipeline walks the union of every extractor's paths,
+# fetches each distinct URL once, wraps it in a lazily parsed Document, and
+# runs every extractor that still wants fields from that path over it. A field
+# keeps the first non-empty value found, and the crawl stops as soon as
+# every extractor is satisfied. Pages found by discovery go first, then the
+# fixed paths best-first by their hit rate in earlier runs (see path_stats).
+# A page stops downloading soon after the stop keywords of every field
+# still wanted from it have gone by, and an extractor none of whose
+# markers occur on a page is not run on it (see extractors and prefilter).
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from itertools import islice
+from urllib.parse import urlsplit
+
+from . import discovery, dns, fetch
+from .document import Document
+from .domains import normalize_domain
+from .jobs import JobStore, run_key
+from .parsing import ParsePool
+from .path_stats import PathStats
+from .prefilter import Prefilter
+
+log = logging.getLogger(__name__)
+
+PREFLIGHT_BATCH = 500  # hosts resolved at a time when domains are streamed in
+
+
+def crawl_paths(extractors) -> list:
+    return list(dict.fromkeys(path for ex in extractors for path in ex.paths))
+
+
+def output_fields(extractors) -> list:
+    return list(dict.fromkeys(field for ex in extractors for field in ex.fields))
+
+
+def next_path(remaining: list, wanted: dict, stats: PathStats, preferred: list) -> str:
+    # Discovered pages first, in discovery order (skipping any that no
+    # extractor wants any more)
+    for path in preferred:
+        if wanted.get(path):
+            return path
+    if stats is None:
+        return remaining[0]
+    # max() keeps the first of equal scores, i.e. the configured order
+    return max(remaining, key=lambda path: stats.score(wanted[path], path))
+
+
+@lru_cache(maxsize=32)
+def prefilters(extractors: tuple) -> tuple:
+    # (markers in pages, stops in bodies still downloading), keyed by
+    # (extractor, field)
+    markers = {(ex, field): keywords for ex in extractors for field, keywords in ex.markers.items()}
+    stops = {(ex, field): keywords for ex in extractors for field, keywords in ex.stops.items()}
+    return Prefilter(markers), Prefilter(stops, binary=True)
+
+
+def _unmarked(ex) -> bool:
+    # Some field has no marker, so any page may hold it
+    return any(field not in ex.markers for field in ex.fields)
+
+
+def stop_when_seen(prefilter: Prefilter, wanted: list, data: dict):
+    # An `until` for Fetcher.get(): its checks are true once every empty
+    # field of the wanted extractors has matched its stop keywords and its
+    # extractor confirms the value in the body so far; None when one of
+    # them has no stop keywords, and so the page has to be read to the end.
+    wanted_keys = {(ex, field) for ex in wanted for field in ex.fields if not data[field]}
+    if not wanted_keys or any(field not in ex.stops for ex, field in wanted_keys):
+        return None
+    pending_extractors = {ex for ex, _ in wanted_keys}
+
+    def until():
+        # A fresh check per attempt: a retried download starts over
+        unseen = set(wanted_keys)
+
+        def check(body, start) -> bool:
+            hits = prefilter.scan(body, wanted_keys, start)
+            unseen.difference_update(hits)
+            # Only worth confirming again once another stop keyword went by
+            if unseen or not hits:
+                return False
+            doc = Document('', bytes(body).decode('utf-8', 'replace'))
+            confirmed = {(ex, field) for ex in pending_extractors for field in ex.confirm(doc)}
+            return wanted_keys <= confirmed
+        return check
+    return until
+
+
+def worth_parsing(prefilter: Prefilter, wanted: list, text: str) -> list:
+    # The wanted extractors with a marker (or an unmarked field) on the page
+    seen = prefilter.scan(text, [(ex, field) for ex in wanted for field in ex.markers])
+    return [ex for ex in wanted if _unmarked(ex) or any((ex, field) in seen for field in ex.markers)]
+
+
+async def visit(fetcher, domain: str, path: str, wanted: list, data: dict, stats: PathStats,
+                checkpoint=None, whole: bool = False, extractors: tuple = None, pool=None):
+    # Fetch one path, fill `data` from it, and return its Document (or
+    # None). `whole` reads the entire page (up to the cap) even once every
+    # wanted field's stop keywords have been seen, e.g. for its links.
+    # `extractors` (all of the run's) enables the marker checks. With a
+    # parsing.ParsePool the extractors run in its worker processes.
+    page_filter, body_filter = prefilters(extractors) if extractors else (None, None)
+    until = stop_when_seen(body_filter, wanted, data) if body_filter and not whole else None
+    r = await fetcher.get(domain + path, until=until)
+    doc = None
+    if r is not None and r.status_code == 200:
+        doc = Document(r.url, r.text)
+        telemetry = fetcher.telemetry
+        runnable = wanted
+        if page_filter:
+            started = time.perf_counter()
+            runnable = worth_parsing(page_filter, wanted, r.text)
+            if telemetry:
+                telemetry.time('prefilter', time.perf_counter() - started)
+        if pool and (runnable or whole):
+            page = await pool.extract(r.url, r.text, runnable, links=whole)
+            if whole:
+                # Discovery reads the links without parsing the page again
+                doc.links = page.links
+            results = {ex: page.found[i] for i, ex in enumerate(pool.extractors) if i in page.found}
+            if telemetry:
+                for i, seconds in page.seconds.items():
+                    telemetry.time(f'extract:{type(pool.extractors[i]).__name__}', seconds)
+                if page.parse:
+                    telemetry.time('parse', page.parse)
+        else:
+            results = {}
+            for ex in runnable:
+                started, parsed = time.perf_counter(), doc.parse_time
+                results[ex] = ex.extract(doc)
+                if telemetry:
+                    # Parsing triggered by this extractor is counted as parse
+                    parse = doc.parse_time - parsed
+                    telemetry.time(f'extract:{type(ex).__name__}', time.perf_counter() - started - parse)
+            if telemetry and doc.parse_time:
+                telemetry.time('parse', doc.parse_time)
+        for ex in wanted:
+            # Extractors skipped for want of their markers found nothing
+            hit = False
+            for field, value in results.get(ex, {}).items():
+                if value and not data[field]:
+                    data[field] = value
+                    hit = True
+            if stats:
+                stats.record(ex, path, hit)
+    elif r is not None and stats:
+        # An unreachable host (r is None) says nothing about the path itself
+        for ex in wanted:
+            stats.record(ex, path, hit=False)
+    if checkpoint:
+        checkpoint.visit(path, r and r.status_code, data)
+    return doc
+
+
+async def harvest_center(fetcher, domain: str, extractors, stats: PathStats = None,
+                         discover: bool = False, checkpoint=None, pool=None) -> dict:
+    domain = domain.rstrip('/')
+    extractors = tuple(extractors)
+    if checkpoint:
+        # Resume: start from the saved fields and skip paths already answered
+        data = checkpoint.data
+        done_paths = checkpoint.visited
+    else:
+        data = {field: '' for field in output_fields(extractors)}
+        done_paths = set()
+    plan = {
+        path: [ex for ex in extractors if path in ex.paths]
+        for path in crawl_paths(extractors) if path not in done_paths or path == '/'
+    }
+    preferred = []
+    if discover:
+        # The homepage is needed for its links whether or not anyone wants it
+        home = await visit(fetcher, domain, '/', plan.pop('/', []), data, stats, checkpoint,
+                           whole=True, extractors=extractors, pool=pool)
+        for path, exs in await discovery.discover(fetcher, domain, home, extractors):
+            if path in done_paths:
+                continue
+            plan[path] = list(dict.fromkeys(plan.get(path, []) + exs))
+            preferred.append(path)
+    elif '/' in done_paths:
+        plan.pop('/', None)
+
+    remaining = list(plan)
+    while remaining:
+        wanted = {
+            path: [ex for ex in plan[path] if not ex.done(data)]
+            for path in remaining
+        }
+        remaining = [path for path in remaining if wanted[path]]
+        if not remaining:
+            break
+        path = next_path(remaining, wanted, stats, preferred)
+        remaining.remove(path)
+        await visit(fetcher, domain, path, wanted[path], data, stats, checkpoint,
+                    extractors=extractors, pool=pool)
+    return data
+
+
+def _preflight(domains, live: dict):
+    # Resolve the hosts of each batch before handing it on; `live` collects
+    # the answers for scrape() to check.
+    if hasattr(domains, '__len__'):
+        live.update(dns.resolve(urlsplit(d).hostname for d in domains))
+        return domains
+    pending = iter(domains)
+
+    def batches():
+        for batch in iter(lambda: list(islice(pending, PREFLIGHT_BATCH)), []):
+            live.update(dns.resolve(urlsplit(d).hostname for d in batch))
+            yield from batch
+
+    return batches()
+
+
+def harvest(domains, extractors, on_progress=None, path_stats=True, discover=True,
+            preflight=True, resume=True, restart=False, workers: int = 0, **options) -> list:
+    """Run every extractor over every domain; one dict of fields per domain.
+
+    `path_stats` is a PathStats, True for the default on-disk one, or False
+    to keep the configured path order. `discover` crawls the best pages
+    found via robots.txt, the sitemap and homepage links before falling
+    back to the fixed paths. `preflight` resolves every host first and
+    skips centers whose domain does not exist. `resume` is a JobStore, True
+    for the default on-disk one, or False; with a store, finished centers
+    come back from it and unfinished ones continue where they stopped, and
+    `restart` discards this configuration's saved progress first.
+    `domains` may be a generator (see cli.harvest_rows); it is consumed
+    lazily and resolved in batches of PREFLIGHT_BATCH hosts just ahead of
+    the crawl. Rows whose domains normalize to the same site (see
+    domains.normalize_domain) are crawled once and each gets a copy of
+    the result. `workers` > 0 parses pages and runs the extractors in that
+    many processes (see parsing) instead of on the event loop. `options`
+    are passed through to fetch.run(); with `replay` (see archive) the run
+    touches neither the network nor the on-disk stores, so there is no
+    preflight, path ordering or resuming.
+    """
+    if options.get('replay') is not None:
+        preflight = path_stats = resume = False
+    fields = output_fields(extractors)
+    live = {}
+    if preflight:
+        domains = _preflight(domains, live)
+    owned = path_stats is True
+    stats = PathStats() if owned else (path_stats or None)
+    owned_store = resume is True
+    store = JobStore() if owned_store else (resume or None)
+    run = run_key(extractors) if store else None
+    if store and restart:
+        store.reset(run)
+    finished = store.finished(run) if store else {}
+    pool = ParsePool(extractors, workers) if workers else None
+
+    async def crawl(fetcher, domain):
+        key = domain.rstrip('/')
+        if key in finished:
+            return finished[key]
+        checkpoint = store.checkpoint(run, key, fields) if store else None
+        if live.get(urlsplit(domain).hostname) is False:
+            data = {field: '' for field in fields}
+            if checkpoint:
+                # No DNS answer: retry this center on the next run
+                checkpoint.finish(data, failed=True)
+            return data
+        try:
+            data = await harvest_center(fetcher, domain, extractors, stats, discover, checkpoint, pool)
+        except Exception:
+            # One odd site must not end the run: its row comes back blank
+            # and it is retried next time
+            log.exception('harvesting %s failed', domain)
+            if checkpoint:
+                checkpoint.finish(checkpoint.data, failed=True)
+            return {field: '' for field in fields}
+        if checkpoint:
+            # Nothing answered (or only with errors): retry this center on the next run
+            checkpoint.finish(data, failed=not checkpoint.reached)
+        return data
+
+    # HRSA lists repeat an organization once per service site; the first row
+    # for a site starts its crawl and later ones wait on the same task. A
+    # finished task is swapped for its fields, so only those are kept.
+    crawls = {}
+
+    async def scrape(fetcher, domain):
+        site = normalize_domain(domain)
+        if site not in crawls:
+            crawls[site] = asyncio.ensure_future(crawl(fetcher, domain))
+        known = crawls[site]
+        if isinstance(known, asyncio.Future):
+            known = crawls[site] = await known
+        return dict(known)
+
+    try:
+        return fetch.run(domains, scrape, on_progress=on_progress, **options)
+    finally:
+        if pool:
+            pool.close()
+        if owned:
+            stats.close()
+        if owned_store:
+            store.close()
@@ -0,0 +1,68 @@
+# Cheap keyword check before a page is parsed.
+#
+# Every extractor's field markers and stops (see extractors) are keyword
+# phrases. They are folded into one alternation matched against the
+# lower-cased page, plus one for the all-caps acronyms (CFO, COO), which
+# only count with their case and as a word of their own. One scan of each
+# finds every keyword present; only at those positions are the keys they
+# belong to resolved.
+# A page none of whose keywords occur is never parsed, and the extractors
+# whose keywords are all missing are skipped on pages that are.
+import re
+
+# What may separate the words of a phrase in raw HTML: whitespace, entities
+# and tags ("HR <b>Director</b>")
+GAP = r'(?:\s|&nbsp;|&#160;|<[^>]*>)+'
+
+
+def _phrase(keyword: str, exact: bool) -> str:
+    words = keyword.split() if exact else keyword.lower().split()
+    return GAP.join(re.escape(word) for word in words)
+
+
+class Prefilter:
+    def __init__(self, markers: dict, binary: bool = False):
+        # `markers` maps any key to its keywords; `binary` compiles for
+        # bytes (a body still downloading) instead of str
+        def compile_(pattern):
+            return re.compile(pattern.encode() if binary else pattern)
+
+        # exact? -> [(key, phrase pattern)]
+        phrases = {False: [], True: []}
+        for key, keywords in markers.items():
+            for keyword in keywords:
+                exact = keyword.isupper()
+                phrases[exact].append((key, _phrase(keyword, exact)))
+        # Acronyms are checked for a word boundary where they were found,
+        # which keeps lookarounds (and so a slow scan) out of the alternation
+        self._keys = {exact: [(key, compile_(rf'(?<![A-Za-z]){pattern}(?![A-Za-z])' if exact else pattern))
+                              for key, pattern in found]
+                      for exact, found in phrases.items()}
+        # One alternation per case, scanned once per page
+        self._any = {exact: compile_('|'.join(pattern for _, pattern in found))
+                     for exact, found in phrases.items() if found}
+
+    def scan(self, page, keys=None, start: int = 0) -> set:
+        """The keys (of `keys`, default all) with a keyword in `page[start:]`."""
+        keys = None if keys is None else set(keys)
+        if start:
+            # Only the new part of a growing body, so it is lowered once
+            page = page[start:]
+        found = set()
+        for exact, combined in self._any.items():
+            text = page if exact else page.lower()
+            pending = [(key, regex) for key, regex in self._keys[exact]
+                       if (keys is None or key in keys) and key not in found]
+            pos = 0
+            while pending:
+                m = combined.search(text, pos)
+                if m is None:
+                    break
+                # Several keywords may start at the same place, or overlap
+                hits = {key for key, regex in pending if regex.match(text, m.start())}
+                if hits:
+                    found |= hits
+                    pending = [(key, regex) for key, regex in pending if key not in hits]
+                pos = m.start() + 1
+        return found
+
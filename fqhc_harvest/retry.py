@@ -0,0 +1,72 @@
+# Retry policy by failure class.
+#
+# A failed request is sorted into one of the classes below and retried
+# according to that class's Backoff: a capped exponential delay with full
+# jitter, so retries against one host spread out instead of arriving in
+# lock step. Fetcher sleeps between attempts outside its request slots, so
+# a retry never holds up other hosts. Failures that say the whole host is
+# unreachable (DNS, TLS, refused or timed-out connects) trip its circuit
+# breaker once their retries are spent.
+import asyncio
+import random
+from dataclasses import dataclass
+
+import aiohttp
+
+CONNECT_TIMEOUT = 'connect-timeout'
+READ_TIMEOUT = 'read-timeout'
+DNS = 'dns'
+TLS = 'tls'
+REFUSED = 'refused'
+DISCONNECTED = 'disconnected'
+SERVER_ERROR = 'server-error'
+SLOW_DOWN = 'slow-down'
+OTHER = 'other'
+
+# Statuses retried as SERVER_ERROR (503 goes through the throttle instead)
+SERVER_ERRORS = {500, 502, 504}
+
+
+@dataclass(frozen=True)
+class Backoff:
+    retries: int = 0
+    base: float = 0.5   # seconds; the step doubles on every attempt
+    cap: float = 8.0    # seconds; no step is longer than this
+    trip: bool = False  # give up on the whole host when retries run out
+
+    def delay(self, attempt: int) -> float:
+        # Full jitter: anywhere between 0 and the capped step
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+
+POLICY = {
+    CONNECT_TIMEOUT: Backoff(retries=1, base=1.0, cap=4.0, trip=True),
+    READ_TIMEOUT: Backoff(retries=1, base=1.0, cap=4.0),
+    DNS: Backoff(retries=1, base=2.0, cap=4.0, trip=True),
+    TLS: Backoff(trip=True),
+    REFUSED: Backoff(trip=True),
+    DISCONNECTED: Backoff(retries=2, base=0.5, cap=4.0),
+    SERVER_ERROR: Backoff(retries=2, base=1.0, cap=8.0),
+    # The throttle already paused the host for Retry-After; no extra delay
+    SLOW_DOWN: Backoff(retries=2, base=0.0, cap=0.0),
+    OTHER: Backoff(),
+}
+
+
+def classify(error: Exception) -> str:
+    # Most specific first: the DNS, TLS and connect-timeout errors are all
+    # ClientConnectorError/ClientOSError subclasses
+    if isinstance(error, aiohttp.ClientConnectorDNSError):
+        return DNS
+    if isinstance(error, aiohttp.ClientSSLError):
+        return TLS
+    if isinstance(error, aiohttp.ConnectionTimeoutError):
+        return CONNECT_TIMEOUT
+    if isinstance(error, aiohttp.ClientConnectorError):
+        return REFUSED
+    if isinstance(error, asyncio.TimeoutError):
+        return READ_TIMEOUT
+    if isinstance(error, (aiohttp.ServerDisconnectedError, aiohttp.ClientOSError,
+                          aiohttp.ClientPayloadError)):
+        return DISCONNECTED
+    return OTHER
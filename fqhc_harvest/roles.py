@@ -0,0 +1,182 @@
+# Single-pass role matching.
+#
+# All configured titles are compiled into one alternation and found with a
+# single finditer over the page text. For each title hit we look back a
+# short window for the "Firstname Lastname" in front of it, instead of
+# running one name-prefixed regex per role over the whole page (the name
+# prefix backtracks over every capitalised word on the page).
+import re
+
+# Output column -> spellings of that title. Acronyms are matched
+# case-sensitively, everything else case-insensitively.
+ROLES = {
+    'Chief Executive Officer': ['Chief Executive Officer', 'CEO', 'President and CEO', 'President & CEO'],
+    'Chief Financial Officer': ['Chief Financial Officer', 'CFO'],
+    'Chief Operating Officer': ['Chief Operating Officer', 'COO'],
+    'Chief Medical Officer': ['Chief Medical Officer', 'CMO'],
+    'Chief Dental Officer': ['Chief Dental Officer', 'CDO'],
+    'Chief Nursing Officer': ['Chief Nursing Officer', 'CNO'],
+    'Chief Information Officer': ['Chief Information Officer', 'CIO'],
+    'Chief Technology Officer': ['Chief Technology Officer', 'CTO'],
+    'Chief Compliance Officer': ['Chief Compliance Officer'],
+    'Chief Quality Officer': ['Chief Quality Officer'],
+    'Chief Strategy Officer': ['Chief Strategy Officer'],
+    'Chief Development Officer': ['Chief Development Officer'],
+    'Chief Administrative Officer': ['Chief Administrative Officer', 'CAO'],
+    'Chief Human Resources Officer': ['Chief Human Resources Officer', 'Chief People Officer', 'CHRO'],
+    'Chief Behavioral Health Officer': ['Chief Behavioral Health Officer'],
+    'Chief Clinical Officer': ['Chief Clinical Officer'],
+    'Chief Program Officer': ['Chief Program Officer'],
+    'Chief Experience Officer': ['Chief Experience Officer', 'Chief Patient Experience Officer'],
+    'Executive Director': ['Executive Director'],
+    'Deputy Director': ['Deputy Director', 'Deputy Executive Director'],
+    'President': ['President'],
+    'Vice President of Operations': ['Vice President of Operations', 'VP of Operations'],
+    'Vice President of Finance': ['Vice President of Finance', 'VP of Finance'],
+    'Human Resources Director': ['Human Resources Director', 'Director of Human Resources', 'HR Director'],
+    'Human Resources Manager': ['Human Resources Manager', 'HR Manager'],
+    'Medical Director': ['Medical Director', 'Associate Medical Director'],
+    'Dental Director': ['Dental Director', 'Director of Dental Services'],
+    'Behavioral Health Director': ['Behavioral Health Director', 'Director of Behavioral Health'],
+    'Pharmacy Director': ['Pharmacy Director', 'Director of Pharmacy'],
+    'Director of Nursing': ['Director of Nursing', 'Nursing Director'],
+    'Finance Director': ['Finance Director', 'Director of Finance'],
+    'Controller': ['Controller', 'Comptroller'],
+    'Operations Director': ['Operations Director', 'Director of Operations'],
+    'Clinical Director': ['Clinical Director', 'Director of Clinical Services'],
+    'Quality Director': ['Quality Director', 'Director of Quality', 'Quality Improvement Director'],
+    'Compliance Officer': ['Compliance Officer', 'Compliance Director', 'Director of Compliance'],
+    'IT Director': ['IT Director', 'Director of Information Technology', 'Director of IT'],
+    'Development Director': ['Development Director', 'Director of Development'],
+    'Marketing Director': ['Marketing Director', 'Director of Marketing', 'Director of Communications'],
+    'Outreach Director': ['Outreach Director', 'Director of Outreach', 'Community Engagement Director'],
+    'Grants Manager': ['Grants Manager', 'Grants Director', 'Director of Grants'],
+    'Practice Manager': ['Practice Manager', 'Clinic Manager', 'Site Manager'],
+    'Revenue Cycle Director': ['Revenue Cycle Director', 'Director of Revenue Cycle', 'Billing Director'],
+    'Patient Services Director': ['Patient Services Director', 'Director of Patient Services'],
+    'Enabling Services Director': ['Enabling Services Director', 'Director of Enabling Services'],
+    'Optometry Director': ['Optometry Director', 'Director of Optometry'],
+    'Women\'s Health Director': ['Women\'s Health Director', 'Director of Women\'s Health'],
+    'Pediatrics Director': ['Pediatrics Director', 'Director of Pediatrics'],
+    'Facilities Director': ['Facilities Director', 'Director of Facilities'],
+    'Recruitment Manager': ['Recruitment Manager', 'Talent Acquisition Manager', 'Recruiter'],
+    'Board Chair': ['Board Chair', 'Chair of the Board', 'Board President'],
+    'Board Treasurer': ['Board Treasurer', 'Treasurer'],
+    'Board Secretary': ['Board Secretary', 'Secretary'],
+}
+
+# Characters of text in front of a title searched for the name
+WINDOW = 80
+
+# What joins the titles of one person ("Vice President and CFO",
+# "Treasurer & CFO", "President, CEO", "CEO/CFO")
+JOINER = re.compile(r'\s*(?:,\s*and|,|and|&|/)?\s*', re.I)
+
+# One word of a name; inner capitals for "McDonald", "LaToya", "O'Neil"
+NAME_WORD = r"[A-Z][a-z'’-]+(?:[A-Z][a-z'’-]+)*"
+
+# "Jane Doe", "Jane Q. Doe", "Mary-Kate O'Neil", optionally with ", MD"-style
+# credentials, then the same separator the old patterns allowed, then the
+# end of the window (i.e. the start of the title).
+NAME_BEFORE = re.compile(
+    rf"({NAME_WORD}(?:\s+(?:[A-Z]\.|{NAME_WORD})){{1,3}})"
+    r"(?:\s*,\s*[A-Z][A-Za-z.]{1,6})*"
+    r"\s*[-–—,:|]?\s*$"
+)
+
+
+# Capitalised heading words that the name pattern would otherwise swallow,
+# e.g. "Meet Our Leadership Team Jane Doe - CEO".
+NOT_NAMES = {
+    'About', 'Administration', 'Board', 'Contact', 'Directors', 'Executive', 'Leadership',
+    'Management', 'Meet', 'Our', 'Senior', 'Staff', 'Team', 'The', 'Us',
+}
+# ...and the words of any title ("Chief", "Officer", "Director"), which an
+# unmatched title in front of a name leaves behind
+NOT_NAMES |= {word for aliases in ROLES.values() for alias in aliases
+              for word in alias.split() if word[0].isupper() and not word.isupper()}
+
+
+def _clean_name(name: str) -> str:
+    words = name.split()
+    while words and words[0] in NOT_NAMES:
+        words.pop(0)
+    return ' '.join(words) if len(words) >= 2 else ''
+
+
+def _title_regex(alias: str) -> str:
+    return r'\s+'.join(re.escape(word) for word in alias.split())
+
+
+class RoleMatcher:
+    def __init__(self, roles=None):
+        # `roles` is a list of ROLES keys (or new titles), or a dict of
+        # column -> spellings.
+        if roles is None:
+            roles = ROLES
+        if not isinstance(roles, dict):
+            roles = {role: ROLES.get(role, [role]) for role in roles}
+        self.roles = list(roles)
+        self._lookup = {}
+        exact, folded = [], []
+        for role, aliases in roles.items():
+            for alias in aliases:
+                if alias.isupper():
+                    self._lookup[alias] = role
+                    exact.append(alias)
+                else:
+                    self._lookup[alias.lower()] = role
+                    folded.append(alias)
+        # Every known title is matched, configured or not, so a name never
+        # reaches back over another title; only configured ones are looked up.
+        for aliases in ROLES.values():
+            for alias in aliases:
+                if alias.isupper() and alias not in self._lookup:
+                    exact.append(alias)
+                elif not alias.isupper() and alias.lower() not in self._lookup:
+                    folded.append(alias)
+        # Longest first so "Chief Human Resources Officer" beats "Human
+        # Resources ..." and "Deputy Executive Director" beats "Executive Director".
+        alternation = []
+        if folded:
+            folded.sort(key=len, reverse=True)
+            alternation.append('(?i:' + '|'.join(map(_title_regex, folded)) + ')')
+        if exact:
+            exact.sort(key=len, reverse=True)
+            alternation.append('(?:' + '|'.join(map(_title_regex, exact)) + ')')
+        self._titles = re.compile(r'\b(?:' + '|'.join(alternation) + r')\b')
+
+    def markers(self) -> dict:
+        # Column -> its spellings, as prefilter keywords
+        markers = {}
+        for alias, role in self._lookup.items():
+            markers.setdefault(role, []).append(alias)
+        return markers
+
+    def _role(self, title: str) -> str:
+        title = ' '.join(title.split())
+        return self._lookup.get(title) or self._lookup.get(title.lower())
+
+    def find(self, text: str) -> dict:
+        found = {role: '' for role in self.roles}
+        missing = len(found)
+        # The name for a title never reaches back past the previous title,
+        # configured or not, unless the two are joined into one person's
+        # titles; then it is looked for in front of the first of them.
+        prev_end = 0
+        boundary = chain = 0
+        for m in self._titles.finditer(text):
+            if not prev_end or not JOINER.fullmatch(text, prev_end, m.start()):
+                boundary, chain = prev_end, m.start()
+            prev_end = m.end()
+            role = self._role(m.group(0))
+            if role is None or found[role]:
+                continue
+            name = NAME_BEFORE.search(text, max(boundary, chain - WINDOW), chain)
+            name = _clean_name(name.group(1)) if name else ''
+            if name:
+                found[role] = name
+                missing -= 1
+                if not missing:
+                    break
+        return found
@@ -0,0 +1,89 @@
+# Background harvest jobs.
+#
+# A Runner owns a small pool of worker threads. submit() queues a job and
+# returns its ID straight away; the job runs off the caller's thread (each
+# worker gets its own event loop via asyncio.run) and reports progress into
+# its Job record, which status() hands back as a snapshot. One Runner is
+# shared by every Streamlit session, so several users can queue lists at
+# once and a page rerun only ever polls.
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+WORKERS = 2          # harvests running at the same time; the rest queue
+KEEP_FINISHED = 3600  # seconds a finished job's result stays available
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+@dataclass
+class Job:
+    id: str
+    label: str
+    status: str = QUEUED
+    done: int = 0
+    total: int = 0
+    error: str = ''
+    submitted: float = field(default_factory=time.time)
+    started: float = 0.0
+    finished: float = 0.0
+
+
+class Runner:
+    def __init__(self, workers: int = WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='harvest')
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._results = {}
+
+    def submit(self, fn, *args, label: str = '', **kwargs) -> str:
+        """Queue `fn(*args, on_progress=..., **kwargs)`; return the job ID."""
+        self._purge()
+        job = Job(uuid.uuid4().hex[:8], label)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._pool.submit(self._work, job, fn, args, kwargs)
+        return job.id
+
+    def _work(self, job: Job, fn, args, kwargs):
+        def on_progress(done, total):
+            job.done, job.total = done, total
+
+        job.status, job.started = RUNNING, time.time()
+        try:
+            result = fn(*args, on_progress=on_progress, **kwargs)
+        except Exception:
+            job.error = traceback.format_exc()
+            job.status = FAILED
+        else:
+            with self._lock:
+                self._results[job.id] = result
+            job.status = DONE
+        job.finished = time.time()
+
+    def status(self, job_id: str):
+        # A copy of the job's fields, or None for an unknown/expired ID
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return asdict(job) if job else None
+
+    def result(self, job_id: str):
+        with self._lock:
+            return self._results.get(job_id)
+
+    def jobs(self) -> list:
+        with self._lock:
+            return [asdict(job) for job in self._jobs.values()]
+
+    def _purge(self):
+        cutoff = time.time() - KEEP_FINISHED
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+                del self._jobs[job_id]
+                self._results.pop(job_id, None)
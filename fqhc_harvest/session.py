@@ -0,0 +1,27 @@
+# Shared pooled HTTP session.
+#
+# One aiohttp session (and so one connection pool) is shared by every
+# request in a run, so the up-to-10 paths tried per center reuse the same
+# keep-alive TCP+TLS connection instead of reconnecting each time.
+import aiohttp
+
+# Browser User-Agent; some FQHC hosts reject the default client UA.
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
+
+POOL_SIZE = 100   # open connections across all hosts
+POOL_PER_HOST = 4  # open connections to a single host
+KEEPALIVE = 30    # seconds an idle connection stays in the pool
+DNS_TTL = 300     # seconds the connector caches a host lookup
+
+
+def make_session(pool_size: int = POOL_SIZE, per_host: int = POOL_PER_HOST,
+                 keepalive: float = KEEPALIVE, headers: dict = None,
+                 trace_configs: list = None) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=pool_size,
+        limit_per_host=per_host,
+        keepalive_timeout=keepalive,
+        ttl_dns_cache=DNS_TTL,
+    )
+    return aiohttp.ClientSession(connector=connector, headers={**HEADERS, **(headers or {})},
+                                 trace_configs=trace_configs)
@@ -0,0 +1,20 @@
+# Locations and connection setup shared by the on-disk stores.
+import os
+import sqlite3
+from pathlib import Path
+
+# Everything persisted between runs lives under this directory.
+CACHE_DIR = Path(os.environ.get('FQHC_CACHE_DIR', '.fqhc_cache'))
+
+
+def connect(path, name: str) -> sqlite3.Connection:
+    # Open one of the on-disk stores (`name` under CACHE_DIR unless `path`
+    # is given). Autocommit + WAL lets several harvests share a store at
+    # once without holding write locks across a crawl.
+    if path is None:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path = CACHE_DIR / name
+    db = sqlite3.connect(str(path), timeout=30, isolation_level=None, check_same_thread=False)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    return db
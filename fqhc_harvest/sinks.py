@@ -0,0 +1,120 @@
+# Streaming output.
+#
+# A sink takes one row (a dict) at a time as each center finishes and
+# writes it straight to disk, so nothing accumulates in memory however long
+# the list is and the file on disk always holds every row finished so far.
+# Rows arrive in completion order, not input order. CSV and JSONL are
+# flushed per row and can be read back (or offered for download) while the
+# harvest is still running; a write-only openpyxl workbook streams its rows
+# to a temp file and becomes a valid .xlsx only once it is closed. The apps
+# write both (see job_sink): the CSV to watch, the workbook to download.
+import csv
+import json
+import re
+from pathlib import Path
+
+from .settings import CACHE_DIR
+
+
+class Sink:
+    def write(self, row: dict):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CSVSink(Sink):
+    def __init__(self, path, fields):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=list(fields), extrasaction='ignore')
+        self._writer.writeheader()
+        self._file.flush()
+
+    def write(self, row: dict):
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JSONLSink(Sink):
+    def __init__(self, path, fields=None):
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, row: dict):
+        self._file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ExcelSink(Sink):
+    def __init__(self, path, fields):
+        from openpyxl import Workbook
+
+        self._path = path
+        self._fields = list(fields)
+        self._book = Workbook(write_only=True)
+        self._sheet = self._book.create_sheet()
+        self._sheet.append(self._fields)
+
+    def write(self, row: dict):
+        self._sheet.append([row.get(field, '') for field in self._fields])
+
+    def close(self):
+        self._book.save(self._path)
+
+
+class TeeSink(Sink):
+    # Every row to each of several sinks
+    def __init__(self, *sinks):
+        self._sinks = sinks
+
+    def write(self, row: dict):
+        for sink in self._sinks:
+            sink.write(row)
+
+    def close(self):
+        for sink in self._sinks:
+            sink.close()
+
+
+SINKS = {
+    'csv': CSVSink,
+    'jsonl': JSONLSink,
+    'xlsx': ExcelSink,
+}
+
+
+def open_sink(path, fields, fmt: str = None) -> Sink:
+    fmt = fmt or Path(path).suffix.lstrip('.').lower()
+    if fmt not in SINKS:
+        raise ValueError(f'no streaming writer for {fmt!r}; use one of {", ".join(SINKS)}')
+    return SINKS[fmt](path, fields)
+
+
+def output_path(name: str, suffix: str = '.csv') -> Path:
+    # A file under CACHE_DIR/outputs for a job's rows, named after `name`
+    folder = CACHE_DIR / 'outputs'
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder / (re.sub(r'[^\w.-]+', '_', name) + suffix)
+
+
+def excel_path(path) -> Path:
+    # The workbook written next to a job's CSV by job_sink()
+    return Path(path).with_suffix('.xlsx')
+
+
+def job_sink(path, fields) -> Sink:
+    """Rows to the CSV at `path`, readable while the job runs, and to the
+    .xlsx next to it (see excel_path), which is complete once closed."""
+    return TeeSink(CSVSink(path, fields), ExcelSink(excel_path(path), fields))
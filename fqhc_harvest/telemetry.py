@@ -0,0 +1,245 @@
+# Where a harvest spends its time.
+#
+# Every HTTP attempt becomes a RequestRecord with its stage timings, taken
+# from aiohttp's tracing hooks plus Fetcher's own clock:
+#
+#   queue       waiting for the host's limit, token and a global slot
+#   dns         resolving the host (0 on a connector cache hit)
+#   connect     opening the connection, TLS handshake included (aiohttp
+#               reports connection setup as one span, so TLS cannot be
+#               split out; the DNS lookup happens inside that span and is
+#               taken out of it, so the stages add up to the total)
+#   first_byte  request sent until the response headers arrived
+#   download    reading the body
+#
+# Page processing adds `parse` (building the Document's trees) and one
+# `extract:<Extractor>` stage per extractor. Telemetry keeps running
+# aggregates only (per stage, host, status and failure class), so memory
+# stays flat; each record can also be appended to a JSONL file as it
+# happens. Aggregates export as Prometheus text.
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+import aiohttp
+
+# Histogram bucket bounds (seconds) for the Prometheus export
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUEST_STAGES = ('queue', 'dns', 'connect', 'first_byte', 'download')
+TOP_HOSTS = 20  # hosts listed by slowest_hosts() and the Prometheus export
+
+
+@dataclass
+class RequestRecord:
+    url: str
+    host: str
+    attempt: int = 0
+    status: int = None
+    failure: str = None
+    cached: bool = False
+    reused: bool = False
+    bytes: int = 0
+    queue: float = 0.0
+    dns: float = 0.0
+    connect: float = 0.0
+    first_byte: float = 0.0
+    download: float = 0.0
+    total: float = 0.0
+    # clock readings taken by the trace hooks; not exported
+    _started: float = 0.0
+    _headers: float = 0.0
+    _marks: dict = field(default_factory=dict)
+
+
+class Stage:
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+
+class Host:
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+
+class Telemetry:
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._hosts = {}
+        self._statuses = {}
+        self._failures = {}
+        self.cache_hits = 0
+        self._log = open(path, 'w', encoding='utf-8') if path else None
+        self.path = path
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        # Hooks that fill the RequestRecord passed as trace_request_ctx
+        config = aiohttp.TraceConfig()
+
+        def hook(fn):
+            async def on_event(session, ctx, params):
+                if isinstance(ctx.trace_request_ctx, RequestRecord):
+                    fn(ctx.trace_request_ctx)
+            return on_event
+
+        def start(rec):
+            rec._started = time.perf_counter()
+
+        def span(name):
+            # Paired *_start/*_end hooks; redirects can add several spans
+            def begin(rec):
+                rec._marks[name] = time.perf_counter()
+
+            def end(rec):
+                began = rec._marks.pop(name, None)
+                if began is not None:
+                    setattr(rec, name, getattr(rec, name) + time.perf_counter() - began)
+            return begin, end
+
+        def headers(rec):
+            rec._headers = time.perf_counter()
+
+        def reused(rec):
+            rec.reused = True
+
+        dns_start, dns_end = span('dns')
+        connect_start, connect_end = span('connect')
+        config.on_request_start.append(hook(start))
+        config.on_dns_resolvehost_start.append(hook(dns_start))
+        config.on_dns_resolvehost_end.append(hook(dns_end))
+        config.on_connection_create_start.append(hook(connect_start))
+        config.on_connection_create_end.append(hook(connect_end))
+        config.on_connection_reuseconn.append(hook(reused))
+        config.on_request_end.append(hook(headers))
+        return config
+
+    def finish(self, rec: RequestRecord, done: float = None):
+        # Called by Fetcher once the body is read or the attempt failed
+        done = done or time.perf_counter()
+        if rec._started:
+            rec.total = done - rec._started
+            # The resolver's hooks fire within connection setup
+            rec.connect = max(rec.connect - rec.dns, 0.0)
+            if rec._headers:
+                rec.first_byte = max(rec._headers - rec._started - rec.dns - rec.connect, 0.0)
+                rec.download = done - rec._headers
+        with self._lock:
+            for name in REQUEST_STAGES:
+                if name != 'queue' and not rec._started:
+                    continue
+                self._stage(name).add(getattr(rec, name))
+            host = self._hosts.setdefault(rec.host, Host())
+            host.requests += 1
+            host.bytes += rec.bytes
+            host.seconds += rec.queue + rec.total
+            if rec.failure:
+                host.failures += 1
+                self._failures[rec.failure] = self._failures.get(rec.failure, 0) + 1
+            if rec.status is not None:
+                self._statuses[rec.status] = self._statuses.get(rec.status, 0) + 1
+            if self._log:
+                self._write(rec)
+
+    def cache_hit(self, url: str, host: str, status: int):
+        with self._lock:
+            self.cache_hits += 1
+            if self._log:
+                self._write(RequestRecord(url, host, status=status, cached=True))
+
+    def time(self, stage: str, seconds: float):
+        # Processing stages: 'parse', 'extract:<Extractor>'
+        with self._lock:
+            self._stage(stage).add(seconds)
+
+    def _stage(self, name: str) -> Stage:
+        if name not in self._stages:
+            self._stages[name] = Stage()
+        return self._stages[name]
+
+    def _write(self, rec: RequestRecord):
+        row = {k: v for k, v in asdict(rec).items() if not k.startswith('_')}
+        self._log.write(json.dumps(row) + '\n')
+
+    def close(self):
+        if self._log:
+            self._log.close()
+            self._log = None
+
+    def stages(self) -> list:
+        """One row per stage: count, total/mean/max seconds, share of the total."""
+        with self._lock:
+            overall = sum(stage.sum for stage in self._stages.values()) or 1.0
+            return [
+                {
+                    'stage': name,
+                    'count': stage.count,
+                    'total_s': round(stage.sum, 3),
+                    'mean_ms': round(1000 * stage.sum / stage.count, 1) if stage.count else 0.0,
+                    'max_ms': round(1000 * stage.max, 1),
+                    'share': round(stage.sum / overall, 3),
+                }
+                for name, stage in sorted(self._stages.items(), key=lambda item: -item[1].sum)
+            ]
+
+    def slowest_hosts(self, top: int = TOP_HOSTS) -> list:
+        with self._lock:
+            ranked = sorted(self._hosts.items(), key=lambda item: -item[1].seconds)[:top]
+            return [
+                {'host': name, 'requests': host.requests, 'failures': host.failures,
+                 'seconds': round(host.seconds, 3), 'kb': round(host.bytes / 1024, 1)}
+                for name, host in ranked
+            ]
+
+    def counts(self) -> dict:
+        with self._lock:
+            return {
+                'requests': sum(host.requests for host in self._hosts.values()),
+                'cache_hits': self.cache_hits,
+                'statuses': dict(sorted(self._statuses.items())),
+                'failures': dict(sorted(self._failures.items())),
+            }
+
+    def prometheus(self) -> str:
+        """The aggregates in the Prometheus text exposition format."""
+        lines = [
+            '# HELP fqhc_stage_seconds Time spent per request and processing stage.',
+            '# TYPE fqhc_stage_seconds histogram',
+        ]
+        with self._lock:
+            for name, stage in sorted(self._stages.items()):
+                for bound, count in zip(BUCKETS, stage.buckets):
+                    lines.append(f'fqhc_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+                lines.append(f'fqhc_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {stage.count}')
+                lines.append(f'fqhc_stage_seconds_sum{{stage="{name}"}} {stage.sum:.6f}')
+                lines.append(f'fqhc_stage_seconds_count{{stage="{name}"}} {stage.count}')
+            lines += ['# HELP fqhc_responses_total Responses by HTTP status.',
+                      '# TYPE fqhc_responses_total counter']
+            lines += [f'fqhc_responses_total{{status="{status}"}} {n}' for status, n in sorted(self._statuses.items())]
+            lines += ['# HELP fqhc_failures_total Failed attempts by failure class.',
+                      '# TYPE fqhc_failures_total counter']
+            lines += [f'fqhc_failures_total{{class="{name}"}} {n}' for name, n in sorted(self._failures.items())]
+            lines += ['# HELP fqhc_cache_hits_total Responses served from the response cache.',
+                      '# TYPE fqhc_cache_hits_total counter',
+                      f'fqhc_cache_hits_total {self.cache_hits}',
+                      '# HELP fqhc_response_bytes_total Response body bytes downloaded.',
+                      '# TYPE fqhc_response_bytes_total counter',
+                      f'fqhc_response_bytes_total {sum(h.bytes for h in self._hosts.values())}']
+        lines += ['# HELP fqhc_host_seconds_total Queue plus request time for the slowest hosts.',
+                  '# TYPE fqhc_host_seconds_total counter']
+        lines += [f'fqhc_host_seconds_total{{host="{row["host"]}"}} {row["seconds"]}' for row in self.slowest_hosts()]
+        return '\n'.join(lines) + '\n'
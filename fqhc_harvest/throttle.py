@@ -0,0 +1,127 @@
+# Per-host politeness.
+#
+# Every host gets a token bucket: RATE requests a second with bursts of up
+# to BURST, slowed to one request per Crawl-delay when the site's robots.txt
+# asks for it. A 429 or 503 pauses the host for its Retry-After, or for an
+# exponential backoff when there is none. Fetcher waits for a token before
+# it takes one of the global request slots, so a slow or throttled host
+# never holds up the others; throughput comes from interleaving many hosts.
+import asyncio
+import re
+import time
+from email.utils import parsedate_to_datetime
+
+RATE = 2.0             # requests per second per host
+BURST = 4              # requests a fresh host may send back to back
+MAX_CRAWL_DELAY = 30   # seconds; longer Crawl-delay values are capped
+BACKOFF = 2.0          # seconds of the first backoff without Retry-After
+MAX_BACKOFF = 120.0    # seconds; the backoff doubles up to this
+
+# Responses that mean "slow down" rather than "this page is missing"
+BACKOFF_STATUSES = {429, 503}
+
+
+def crawl_delay(robots: str) -> float:
+    """Crawl-delay for all user agents (`User-agent: *`) in a robots.txt, or 0."""
+    delay, applies, in_agents = 0.0, False, False
+    for line in robots.splitlines():
+        line = line.split('#', 1)[0].strip()
+        field, _, value = line.partition(':')
+        field, value = field.strip().lower(), value.strip()
+        if field == 'user-agent':
+            # Consecutive User-agent lines share one group of rules
+            applies = (applies and in_agents) or value == '*'
+            in_agents = True
+            continue
+        in_agents = False
+        if field == 'crawl-delay' and applies:
+            try:
+                delay = float(value)
+            except ValueError:
+                continue
+    return min(max(delay, 0.0), MAX_CRAWL_DELAY)
+
+
+def retry_after(value: str) -> float:
+    # Seconds from a Retry-After header (delta-seconds or HTTP-date), or None
+    if not value:
+        return None
+    value = value.strip()
+    if re.fullmatch(r'\d+(\.\d+)?', value):
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, rate: float = RATE, burst: int = BURST):
+        self.rate = rate
+        self.burst = burst
+        self.paused_until = 0.0
+        self.strikes = 0
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+
+    def reserve(self) -> float:
+        # Take a token, possibly one that only exists in the future; returns
+        # the seconds to wait before using it
+        now = time.monotonic()
+        start = max(now, self.paused_until)
+        self._tokens = min(self.burst, self._tokens + max(start - self._stamp, 0) * self.rate)
+        self._stamp = max(self._stamp, start)
+        self._tokens -= 1
+        return start - now + (-self._tokens / self.rate if self._tokens < 0 else 0)
+
+    def pause(self, seconds: float):
+        # Nothing goes out until then, and it restarts with a single token
+        # rather than a full burst
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self._tokens = 1.0
+        self._stamp = self.paused_until
+
+
+class Throttle:
+    def __init__(self, rate: float = RATE, burst: int = BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+
+    def bucket(self, host: str) -> TokenBucket:
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    def crawl_delay(self, host: str, seconds: float):
+        # robots.txt asked for one request every `seconds`
+        bucket = self.bucket(host)
+        if seconds and 1 / seconds < bucket.rate:
+            bucket.rate, bucket.burst = 1 / seconds, 1
+            bucket._tokens = min(bucket._tokens, 1.0)
+
+    def backoff(self, host: str, retry_after_header: str = None) -> float:
+        """Pause `host` after a 429/503 and return the pause in seconds."""
+        bucket = self.bucket(host)
+        bucket.strikes += 1
+        delay = retry_after(retry_after_header)
+        if delay is None:
+            delay = min(BACKOFF * 2 ** (bucket.strikes - 1), MAX_BACKOFF)
+        bucket.pause(min(delay, MAX_BACKOFF))
+        return delay
+
+    def ok(self, host: str):
+        # A normal answer ends the backoff streak
+        bucket = self._buckets.get(host)
+        if bucket:
+            bucket.strikes = 0
+
+    async def wait(self, host: str):
+        bucket = self.bucket(host)
+        while True:
+            delay = bucket.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # A 429 may have paused the host while this request was queued
+            if bucket.paused_until <= time.monotonic():
+                return
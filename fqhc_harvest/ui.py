@@ -0,0 +1,154 @@
+# Streamlit glue for running harvests in the background.
+#
+# The page submits its harvest to the shared Runner once, then every rerun
+# just polls the job: progress is drawn from the job record and the page
+# reruns itself until the result is ready. Widget interactions and browser
+# refreshes therefore never restart (or block on) the crawl.
+import csv
+import time
+from collections import deque
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from .runner import DONE, FAILED, Runner
+from .sinks import excel_path
+from .telemetry import Telemetry
+
+POLL = 1.0  # seconds between progress refreshes
+PREVIEW_ROWS = 200  # rows shown of a job's output
+
+
+@st.cache_resource
+def get_runner() -> Runner:
+    # One Runner per Streamlit server process, shared by all sessions
+    return Runner()
+
+
+def show_partial(path):
+    # The latest rows of a CSV a running job is streaming to, plus the
+    # whole file so far as a download (read only when it is clicked, not
+    # on every poll)
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        latest = deque(reader, maxlen=PREVIEW_ROWS)
+    if not header:
+        return
+    # A row still being written may be cut short; leave it for the next poll
+    rows = [row for row in latest if len(row) == len(header)]
+    st.dataframe(pd.DataFrame(rows, columns=header))
+    st.download_button(
+        label="Download partial results (CSV)",
+        data=path.read_bytes,
+        file_name=path.name,
+        mime='text/csv',
+    )
+
+
+def show_result(path, file_name: str):
+    # A finished job's first rows, and its workbook (see sinks.job_sink)
+    # as a download read from disk when clicked
+    preview = pd.read_csv(path, dtype=str, keep_default_na=False, nrows=PREVIEW_ROWS + 1)
+    if len(preview) > PREVIEW_ROWS:
+        st.caption(f"First {PREVIEW_ROWS} rows; the download holds them all")
+    st.dataframe(preview.head(PREVIEW_ROWS))
+    st.download_button(
+        label="Download as Excel",
+        data=excel_path(path).read_bytes,
+        file_name=file_name,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+
+def show_telemetry(telemetry: Telemetry, finished: bool = False):
+    # Aggregate timings of a job so far: stages, slowest hosts, exports
+    with st.expander("Where the time goes"):
+        counts = telemetry.counts()
+        st.write(
+            f"{counts['requests']} requests, {counts['cache_hits']} cache hits; "
+            f"statuses {counts['statuses']}; failures {counts['failures']}"
+        )
+        st.dataframe(pd.DataFrame(telemetry.stages()), hide_index=True)
+        st.write("Slowest hosts")
+        st.dataframe(pd.DataFrame(telemetry.slowest_hosts()), hide_index=True)
+        st.download_button(
+            label="Download metrics (Prometheus)",
+            data=telemetry.prometheus(),
+            file_name='fqhc_metrics.prom',
+            mime='text/plain',
+        )
+        if finished and telemetry.path:
+            st.download_button(
+                label="Download request log (JSONL)",
+                data=Path(telemetry.path).read_bytes,
+                file_name=Path(telemetry.path).name,
+                mime='application/jsonl',
+            )
+
+
+def _measured(fn, telemetry: Telemetry):
+    def job(*args, **kwargs):
+        try:
+            return fn(*args, telemetry=telemetry, **kwargs)
+        finally:
+            telemetry.close()
+    return job
+
+
+def background(key: str, fn, *args, submit=None, partial=None, telemetry=None, **kwargs):
+    """Run `fn(*args, on_progress=..., **kwargs)` as a background job.
+
+    `key` names the job within this browser session. `submit=True` starts a
+    new job unless the one under `key` is still running (both would write
+    the same output), False only polls an existing one, and None starts one
+    when the session has none under `key` yet. Returns the job's result
+    once it is done; until then draws progress and reruns the page, and
+    with `partial` (a CSV the job streams its rows to) shows the rows
+    finished so far. With `telemetry` (True, or a path for the per-request
+    JSONL log) `fn` also gets a `telemetry=` Telemetry, whose stats are
+    shown while the job runs and after it is done.
+    """
+    runner = get_runner()
+    jobs = st.session_state.setdefault('fqhc_jobs', {})
+    measured = st.session_state.setdefault('fqhc_telemetry', {})
+    current = runner.status(jobs[key]) if key in jobs else None
+    if submit and current and current['status'] not in (DONE, FAILED):
+        # A second job would write to the same output files. (A toast, as
+        # the polling reruns below would clear a warning within a second.)
+        st.toast(f"Job {current['id']} is still running; it has to finish before this one can start again")
+    elif submit or (submit is None and key not in jobs):
+        if telemetry:
+            stats = Telemetry(None if telemetry is True else telemetry)
+            jobs[key] = runner.submit(_measured(fn, stats), *args, label=key, **kwargs)
+            measured[jobs[key]] = stats
+        else:
+            jobs[key] = runner.submit(fn, *args, label=key, **kwargs)
+
+    job = runner.status(jobs[key]) if key in jobs else None
+    if job is None:
+        # Nothing submitted yet, or the server restarted since
+        jobs.pop(key, None)
+        st.stop()
+    stats = measured.get(job['id'])
+    if job['status'] == DONE:
+        if stats:
+            show_telemetry(stats, finished=True)
+        return runner.result(job['id'])
+    if job['status'] == FAILED:
+        st.error(f"Harvest job {job['id']} failed")
+        st.code(job['error'])
+        st.stop()
+
+    total = job['total'] or 1
+    st.progress(job['done'] / total, text=f"Job {job['id']}: {job['status']}, {job['done']}/{job['total']} centers")
+    if partial:
+        show_partial(partial)
+    if stats:
+        show_telemetry(stats)
+    time.sleep(POLL)
+    st.rerun()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import pandas as pd
+import streamlit as st
+from io import BytesIO
+
+from fqhc_harvest.cli import build_extractors, columns, harvest_csv
+from fqhc_harvest.extractors import DEFAULT_ROLES, EXTRACTORS
+from fqhc_harvest.roles import ROLES
+from fqhc_harvest.sinks import job_sink, output_path
+from fqhc_harvest.ui import background, get_runner, show_result
+
+# Streamlit App: every scraper in one crawl
+st.title("FQHC Harvest (All Fields)")
+st.markdown(
+    """
+    Upload a CSV of FQHCs (columns 'Name' and optional 'Website').
+    Each page is fetched and parsed once and every selected extractor runs
+    over it, so HR contacts, executives, leadership and founding year come
+    back in a single table.
+    """
+)
+
+uploaded_file = st.file_uploader("Choose CSV file", type="csv")
+if not uploaded_file:
+    st.info("Please upload a CSV file to begin.")
+    st.stop()
+
+# Only a preview is parsed here; the job streams the file in chunks
+st.write("### Uploaded centers:", pd.read_csv(uploaded_file, nrows=5))
+
+chosen = st.multiselect(
+    "Fields to extract",
+    options=list(EXTRACTORS),
+    default=list(EXTRACTORS),
+    format_func=lambda key: EXTRACTORS[key].label,
+)
+roles = DEFAULT_ROLES
+if 'roles' in chosen:
+    roles = st.multiselect("Executive titles", options=list(ROLES), default=DEFAULT_ROLES)
+restart = st.checkbox("Start over (ignore saved progress)")
+run = st.button("Run Harvest", disabled=not chosen)
+
+
+def run_harvest(data, extractors, restart, path, on_progress, telemetry=None):
+    # Each center's row is written out as soon as it finishes
+    with job_sink(path, columns(extractors)) as sink:
+        harvest_csv(BytesIO(data), extractors, sink.write, on_progress=on_progress,
+                    restart=restart, telemetry=telemetry)
+    return path
+
+
+with st.sidebar:
+    st.write("### Jobs on this server")
+    jobs = get_runner().jobs()
+    if jobs:
+        st.dataframe(pd.DataFrame(jobs)[['id', 'label', 'status', 'done', 'total']], hide_index=True)
+
+extractors = build_extractors(chosen, roles)
+# Runs in the background; later reruns of this page only poll the job
+path = output_path(f'harvest-{uploaded_file.file_id}')
+path = background('harvest', run_harvest, uploaded_file.getvalue(), extractors, restart, path, submit=run, partial=path,
+                  telemetry=path.with_suffix('.requests.jsonl'))
+st.write("### Harvest results:")
+show_result(path, 'fqhc_harvest.xlsx')
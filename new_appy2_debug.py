@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
 import re
 import pandas as pd
-import requests
-import tldextract
 import streamlit as st
-from bs4 import BeautifulSoup
 from io import StringIO, BytesIO
 
+from fqhc_harvest import fetch
+from fqhc_harvest.document import Document
+from fqhc_harvest.domains import get_domain
+from fqhc_harvest.telemetry import Telemetry
+from fqhc_harvest.ui import show_telemetry
+
 st.title("FQHC Executive Roles Scraper Debug")
 st.markdown(
     """
@@ -23,15 +26,6 @@ if not uploaded_file:
 df = pd.read_csv(uploaded_file)
 st.write("### Centers to scrape:", df[['Name', 'Website']].fillna(""))
 
-def get_domain(row):
-    site = row.get('Website', '')
-    if pd.notna(site) and site:
-        ext = tldextract.extract(site)
-        if ext.suffix:
-            return f"https://{ext.domain}.{ext.suffix}"
-    slug = re.sub(r'[^a-z0-9]+','-',row['Name'].lower()).strip('-')
-    return f"https://{slug}.org"
-
 df['Domain'] = df.apply(get_domain, axis=1)
 
 paths = [
@@ -44,9 +38,9 @@ patterns = {
     'Chief Financial Officer': re.compile(r'([A-Z][a-z]+(?: [A-Z][a-z]+)+)\s*[-–,:]?\s*Chief Financial Officer', re.IGNORECASE)
 }
 
-log_buf = StringIO()
-results = []
-for _, row in df.iterrows():
+async def debug_center(fetcher, row):
+    # Each center logs into its own buffer so concurrent centers don't interleave
+    log_buf = StringIO()
     name = row['Name']
     domain = row['Domain'].rstrip('/')
     log_buf.write(f"Scraping {name} ({domain})\n")
@@ -55,31 +49,41 @@ for _, row in df.iterrows():
     for path in paths:
         url = domain + path
         log_buf.write(f"  Trying URL: {url}\n")
-        try:
-            resp = requests.get(url, headers={'User-Agent':'Mozilla/5.0'}, timeout=5)
-            log_buf.write(f"    Status: {resp.status_code}\n")
-            if resp.status_code != 200:
-                continue
-            text = ' '.join(BeautifulSoup(resp.text,'html.parser').stripped_strings)
-            if not hr:
-                m = patterns['Human Resources Director'].search(text)
-                if m:
-                    hr = m.group(1)
-                    log_buf.write(f"    Found HR Director: {hr}\n")
-            if not cfo:
-                m = patterns['Chief Financial Officer'].search(text)
-                if m:
-                    cfo = m.group(1)
-                    log_buf.write(f"    Found CFO: {cfo}\n")
-            if hr and cfo:
-                break
-        except Exception as e:
-            log_buf.write(f"    Error: {e}\n")
-    results.append({'Name':name, 'HR Director':hr, 'CFO':cfo})
+        resp = await fetcher.get(url)
+        if resp is None:
+            log_buf.write("    Error: request failed\n")
+            continue
+        log_buf.write(f"    Status: {resp.status_code}\n")
+        if resp.status_code != 200:
+            continue
+        text = Document(resp.url, resp.text).text
+        if not hr:
+            m = patterns['Human Resources Director'].search(text)
+            if m:
+                hr = m.group(1)
+                log_buf.write(f"    Found HR Director: {hr}\n")
+        if not cfo:
+            m = patterns['Chief Financial Officer'].search(text)
+            if m:
+                cfo = m.group(1)
+                log_buf.write(f"    Found CFO: {cfo}\n")
+        if hr and cfo:
+            break
     log_buf.write("---\n")
+    return {'Name':name, 'HR Director':hr, 'CFO':cfo}, log_buf.getvalue()
+
+telemetry = Telemetry()
+found = fetch.run(
+    [row for _, row in df.iterrows()], debug_center, telemetry=telemetry
+)
+results = [entry for entry, _ in found]
+log_buf = StringIO()
+for _, log in found:
+    log_buf.write(log)
 
 st.write("### Debug Log")
 st.text(log_buf.getvalue())
+show_telemetry(telemetry, finished=True)
 
 out_df = pd.DataFrame(results)
 st.write("### Extraction Results")